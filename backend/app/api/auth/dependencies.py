@@ -0,0 +1,40 @@
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.api.auth.schemas import Principal
+from app.api.auth.services import principal_cache, verify_access_token
+
+bearer_scheme = HTTPBearer()
+
+
+async def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> Principal:
+    """
+    Verify the bearer token and resolve the caller's principal from the
+    in-process cache (no Mongo round trip in the common case).
+    """
+    # Sub-requests of /batch reuse the principal the batch already verified.
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
+
+    payload = await verify_access_token(credentials.credentials)
+    principal = await principal_cache.get(payload.get("sub"))
+    if not principal or not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive or unknown user"
+        )
+    request.state.token = payload
+    return principal
+
+
+async def require_admin(
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+    return current_user
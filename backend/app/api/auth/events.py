@@ -0,0 +1,243 @@
+import os
+import time
+import socket
+import asyncio
+from typing import Any, Optional
+from datetime import datetime, timedelta, timezone
+from redis.exceptions import ResponseError
+
+from app.core.config import env
+from app.core.redis import redis_client
+from app.core.task_queue import task_queue
+from app.core.logging import get_logger
+from app.api.auth.models import AuthEvent, AuthEventMeta
+from app.common.utils import utc_now
+
+logger = get_logger("app.api.auth.events")
+
+AUTH_EVENT_STREAM = "auth_events"
+AUTH_EVENT_GROUP = "auth_events_ingest"
+
+EVENT_LOGIN = "login"
+EVENT_LOGOUT = "logout"
+EVENT_LOGIN_FAILED = "login_failed"
+
+STALE_PENDING_MS = 60_000
+STALE_CLAIM_INTERVAL_SECONDS = 30
+
+_DEVICE_MARKERS = (
+    ("iphone", "ios"),
+    ("ipad", "ios"),
+    ("android", "android"),
+    ("windows", "windows"),
+    ("macintosh", "macos"),
+    ("mac os", "macos"),
+    ("linux", "linux"),
+)
+
+
+def device_family(user_agent: Optional[str]) -> str:
+    """Coarse device family from a User-Agent string."""
+    if not user_agent:
+        return "other"
+    ua = user_agent.lower()
+    for marker, family in _DEVICE_MARKERS:
+        if marker in ua:
+            return family
+    return "other"
+
+
+async def _publish(fields: dict[str, str]) -> None:
+    try:
+        await redis_client.xadd(
+            AUTH_EVENT_STREAM,
+            fields,
+            maxlen=env.auth_events_stream_maxlen,
+            approximate=True,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to record auth event: {e}")
+
+
+def record_auth_event(
+    event_type: str, user_id: Optional[str] = None, metadata: dict | None = None
+) -> None:
+    """
+    Append a compact auth event to the Redis stream without blocking the caller.
+    Fields: t=type, u=user id, d=device family, ip, ts=epoch millis.
+    """
+    if not env.auth_events_enabled:
+        return
+    metadata = metadata or {}
+    fields = {
+        "t": event_type,
+        "d": device_family(metadata.get("user_agent")),
+        "ts": str(int(utc_now().timestamp() * 1000)),
+    }
+    if user_id:
+        fields["u"] = user_id
+    if metadata.get("ip"):
+        fields["ip"] = metadata["ip"]
+
+    task_queue.submit(_publish, fields)
+
+
+def _to_document(fields: dict[str, str]) -> AuthEvent:
+    return AuthEvent(
+        ts=datetime.fromtimestamp(int(fields["ts"]) / 1000, tz=timezone.utc),
+        meta=AuthEventMeta(
+            type=fields.get("t", "unknown"),
+            user_id=fields.get("u"),
+            device=fields.get("d", "other"),
+        ),
+        ip=fields.get("ip"),
+    )
+
+
+class AuthEventConsumer:
+    """
+    Drains the auth event stream through a consumer group and bulk-inserts
+    each batch into the AUTH_EVENTS time-series collection.
+    """
+
+    def __init__(self, batch_size: int = env.auth_events_batch_size):
+        self.batch_size = batch_size
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+
+    async def _ensure_group(self) -> None:
+        try:
+            await redis_client.xgroup_create(
+                AUTH_EVENT_STREAM, AUTH_EVENT_GROUP, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _ingest(self, entries: list[tuple[str, dict[str, str]]]) -> int:
+        entries = [(entry_id, fields) for entry_id, fields in entries if fields]
+        if not entries:
+            return 0
+        await AuthEvent.insert_many([_to_document(fields) for _, fields in entries])
+        await redis_client.xack(
+            AUTH_EVENT_STREAM, AUTH_EVENT_GROUP, *(entry_id for entry_id, _ in entries)
+        )
+        return len(entries)
+
+    async def _claim_stale(self) -> None:
+        """Take over entries left pending by consumers that went away (or failed)."""
+        start_id = "0-0"
+        while True:
+            start_id, entries, *_ = await redis_client.xautoclaim(
+                AUTH_EVENT_STREAM,
+                AUTH_EVENT_GROUP,
+                self.consumer,
+                min_idle_time=STALE_PENDING_MS,
+                start_id=start_id,
+                count=self.batch_size,
+            )
+            await self._ingest(entries)
+            if start_id in ("0-0", b"0-0"):
+                return
+
+    async def _run(self) -> None:
+        group_ready = False
+        next_claim = 0.0
+        while True:
+            try:
+                if not group_ready:
+                    await self._ensure_group()
+                    group_ready = True
+                if time.monotonic() >= next_claim:
+                    await self._claim_stale()
+                    next_claim = time.monotonic() + STALE_CLAIM_INTERVAL_SECONDS
+                response = await redis_client.xreadgroup(
+                    AUTH_EVENT_GROUP,
+                    self.consumer,
+                    {AUTH_EVENT_STREAM: ">"},
+                    count=self.batch_size,
+                    block=5000,
+                )
+                for _, entries in response or []:
+                    await self._ingest(entries)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Auth event ingest failed: {e}")
+                if "NOGROUP" in str(e):
+                    # Stream or group was deleted (e.g. Redis flushed): recreate.
+                    group_ready = False
+                await asyncio.sleep(1)
+
+    def start(self) -> None:
+        if env.auth_events_enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Auth event consumer started.")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Auth event consumer stopped.")
+
+
+auth_event_consumer = AuthEventConsumer()
+
+
+async def events_per_hour(hours: int = 24) -> list[dict[str, Any]]:
+    """Login, logout and failure counts per hour over the last `hours` hours."""
+    pipeline = [
+        {"$match": {"ts": {"$gte": utc_now() - timedelta(hours=hours)}}},
+        {
+            "$group": {
+                "_id": {
+                    "hour": {"$dateTrunc": {"date": "$ts", "unit": "hour"}},
+                    "type": "$meta.type",
+                },
+                "count": {"$sum": 1},
+            }
+        },
+        {"$sort": {"_id.hour": 1}},
+    ]
+    buckets: dict[datetime, dict[str, Any]] = {}
+    for row in await AuthEvent.aggregate(pipeline).to_list():
+        hour = row["_id"]["hour"]
+        bucket = buckets.setdefault(
+            hour, {"hour": hour, EVENT_LOGIN: 0, EVENT_LOGOUT: 0, EVENT_LOGIN_FAILED: 0}
+        )
+        bucket[row["_id"]["type"]] = row["count"]
+    return list(buckets.values())
+
+
+async def sessions_per_device(days: int = 30) -> list[dict[str, Any]]:
+    """Logins (sessions started) and distinct users per device family."""
+    pipeline = [
+        {
+            "$match": {
+                "ts": {"$gte": utc_now() - timedelta(days=days)},
+                "meta.type": EVENT_LOGIN,
+            }
+        },
+        # Count distinct users with a second $group rather than $addToSet,
+        # which would build one array of every user id per device.
+        {
+            "$group": {
+                "_id": {"device": "$meta.device", "user": "$meta.user_id"},
+                "sessions": {"$sum": 1},
+            }
+        },
+        {
+            "$group": {
+                "_id": "$_id.device",
+                "sessions": {"$sum": "$sessions"},
+                "users": {"$sum": 1},
+            }
+        },
+        {"$project": {"_id": 0, "device": "$_id", "sessions": 1, "users": 1}},
+        {"$sort": {"sessions": -1}},
+    ]
+    return await AuthEvent.aggregate(pipeline).to_list()
@@ -0,0 +1,32 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+from beanie import Granularity, TimeSeriesConfig
+
+from app.common.models import BaseDocument
+
+
+class AuthEventMeta(BaseModel):
+    type: str
+    user_id: Optional[str] = None
+    device: str = "other"
+
+
+class AuthEvent(BaseDocument):
+    """Login/logout/failure events, stored in a MongoDB time-series collection."""
+
+    ts: datetime
+    meta: AuthEventMeta
+    ip: Optional[str] = None
+
+    class Settings:
+        name = "AUTH_EVENTS"
+        timeseries = TimeSeriesConfig(
+            time_field="ts",
+            meta_field="meta",
+            granularity=Granularity.minutes,
+            expire_after_seconds=90 * 24 * 60 * 60,
+        )
+
+    def __str__(self):
+        return "Auth Events Model."
@@ -1,7 +1,22 @@
-from fastapi import APIRouter, Depends, Request, Response, Cookie, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    Request,
+    Response,
+    Cookie,
+    HTTPException,
+    Query,
+    status,
+)
 from typing import Optional
 
-from app.api.auth.services import user_login, logout_current_session
+from app.api.auth.services import (
+    user_login,
+    logout_current_session,
+    logout_all_sessions,
+)
+from app.api.auth.events import events_per_hour, sessions_per_device
+from app.api.auth.dependencies import require_admin
 from app.api.auth.schemas import (
     Login,
 )
@@ -14,14 +29,18 @@ auth_router = APIRouter()
 REFRESH_COOKIE_NAME = "refresh_token"
 
 
-@auth_router.post("/login", status_code=status.HTTP_200_OK)
-async def login(response: Response, payload: Login, request: Request):
-
-    meta_data = {
+def request_metadata(request: Request) -> dict:
+    return {
         "ip": request.client.host if request and request.client else None,
         "user_agent": request.headers.get("user-agent") if request else None,
     }
 
+
+@auth_router.post("/login", status_code=status.HTTP_200_OK)
+async def login(response: Response, payload: Login, request: Request):
+
+    meta_data = request_metadata(request)
+
     result = await user_login(data=payload.model_dump(), metadata=meta_data)
     refresh_token = result.get("refresh_token")
     max_age = result.get("refresh_expires_in", env.refresh_token_expire_seconds)
@@ -48,6 +67,7 @@ async def login(response: Response, payload: Login, request: Request):
 @auth_router.post("/logout")
 async def logout_from_current_session(
     response: Response,
+    request: Request,
     refresh_token: Optional[str] = Cookie(None),
 ):
     """
@@ -58,10 +78,49 @@ async def logout_from_current_session(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Refresh token missing"
         )
 
-    await logout_current_session(refresh_token)
+    await logout_current_session(refresh_token, metadata=request_metadata(request))
 
     response.delete_cookie(
         key=REFRESH_COOKIE_NAME,
         path="/" if env.app_env == "developement" else "/auth/refresh",
     )
     return success_response("Logged out", data=None)
+
+
+@auth_router.post("/logout-all")
+async def logout_from_all_sessions(
+    response: Response,
+    request: Request,
+    refresh_token: Optional[str] = Cookie(None),
+):
+    """
+    Logout from every device by bumping the user's token version.
+    """
+    if not refresh_token:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Refresh token missing"
+        )
+
+    await logout_all_sessions(refresh_token, metadata=request_metadata(request))
+
+    response.delete_cookie(
+        key=REFRESH_COOKIE_NAME,
+        path="/" if env.app_env == "developement" else "/auth/refresh",
+    )
+    return success_response("Logged out from all devices", data=None)
+
+
+@auth_router.get("/analytics/logins", dependencies=[Depends(require_admin)])
+async def login_analytics(hours: int = Query(24, ge=1, le=24 * 90)):
+    """
+    Logins, logouts and failed logins per hour.
+    """
+    return success_response(data=await events_per_hour(hours=hours))
+
+
+@auth_router.get("/analytics/devices", dependencies=[Depends(require_admin)])
+async def device_analytics(days: int = Query(30, ge=1, le=90)):
+    """
+    Sessions started and distinct users per device family.
+    """
+    return success_response(data=await sessions_per_device(days=days))
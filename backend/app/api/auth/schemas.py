@@ -1,6 +1,15 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 class Login(BaseModel):
     email: EmailStr
     password: str
+
+
+class Principal(BaseModel):
+    # Shared between concurrent requests by the principal cache.
+    model_config = ConfigDict(frozen=True)
+
+    id: str
+    role: str
+    is_active: bool
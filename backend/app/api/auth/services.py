@@ -1,28 +1,298 @@
+import hmac
 import json
+import time
 import uuid
+import asyncio
+import hashlib
 from typing import Optional, Any
+from collections import OrderedDict
 from fastapi import HTTPException, status
+from redis.exceptions import ResponseError
 from beanie.odm.operators.find.logical import Or
-from datetime import datetime, timezone, timedelta
+from beanie.odm.operators.update.general import Set
+from datetime import datetime, timezone
 
 
 from app.core.jwt import create_access_token, create_refresh_token, verify_token
 from app.core.config import env
 from app.api.user.models import User
-from app.core.redis import redis_client
+from app.core.redis import redis_client, redis_read_client, redis_pubsub_client
 from app.core.logging import get_logger
+from app.core.task_queue import task_queue
 from app.common.services import BaseRepository
+from app.common.singleflight import SingleFlight
 from app.common.security import verify_password
+from app.common.utils import utc_now
+from app.core.rate_limitter import (
+    check_login_allowed,
+    register_login_failure,
+    clear_login_failures,
+)
+from app.api.auth.schemas import Principal
+from app.api.auth.events import (
+    record_auth_event,
+    EVENT_LOGIN,
+    EVENT_LOGOUT,
+    EVENT_LOGIN_FAILED,
+)
 
 logger = get_logger("app.api.auth.service")
 
 SESSION_PREFIX = "session"
 BLACKLIST_PREFIX = "blacklist"
+TOKEN_VERSION_PREFIX = "token_version"
+PRINCIPAL_INVALIDATION_CHANNEL = "principal_invalidate"
+SESSION_META_FIELD_PREFIX = "m:"
 
 REFRESH_TOKEN_TTL = 30 * 24 * 60 * 60
 BLACKLIST_TTL = 15 * 60
 
 
+_token_version_cache: dict[str, tuple[float, int]] = {}
+
+
+async def get_token_version(user_id: str) -> int:
+    """
+    Current token version for a user. The Redis counter stores the number of
+    bumps, so a missing key means version 1 (the version every token started
+    with). Cached in process for TOKEN_VERSION_CACHE_SECONDS.
+    """
+    cached = _token_version_cache.get(user_id)
+    now = time.monotonic()
+    if cached and cached[0] > now:
+        return cached[1]
+    bumps = await redis_client.get(f"{TOKEN_VERSION_PREFIX}:{user_id}")
+    version = int(bumps or 0) + 1
+    _token_version_cache[user_id] = (now + env.token_version_cache_seconds, version)
+    return version
+
+
+async def bump_token_version(user_id: str) -> int:
+    """
+    Invalidate every access/refresh token issued to the user so far with a
+    single INCR. The counter never expires: if it reset, tokens issued after
+    earlier bumps would carry a higher 'ver' than later bumps produce and
+    would survive a later revocation.
+    """
+    bumps = await redis_client.incr(f"{TOKEN_VERSION_PREFIX}:{user_id}")
+    version = int(bumps) + 1
+    _token_version_cache[user_id] = (
+        time.monotonic() + env.token_version_cache_seconds,
+        version,
+    )
+    return version
+
+
+async def ensure_token_version(payload: dict[str, Any]) -> dict[str, Any]:
+    """Reject a verified token whose 'ver' claim predates the user's current version."""
+    user_id = payload.get("sub")
+    if payload.get("ver", 0) < await get_token_version(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked"
+        )
+    return payload
+
+
+async def verify_access_token(token: str) -> dict[str, Any]:
+    """Verify an access token's signature, claims and token version."""
+    return await ensure_token_version(verify_token(token, expected_type="access"))
+
+
+def role_for(user: User) -> str:
+    return "admin" if user.is_superuser else "user"
+
+
+class PrincipalCache:
+    """
+    In-process LRU of slim principals with stale-while-revalidate.
+
+    Entries younger than PRINCIPAL_CACHE_TTL_SECONDS are served as-is; entries
+    up to PRINCIPAL_STALE_TTL_SECONDS old are served while a background refresh
+    runs. At most PRINCIPAL_CACHE_MAX_ENTRIES users are kept, unknown subjects
+    included. Invalidations are broadcast to every worker over Redis pub/sub.
+    """
+
+    def __init__(self, max_entries: int = env.principal_cache_max_entries):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Optional[Principal]]] = (
+            OrderedDict()
+        )
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flight = SingleFlight("auth.principal")
+
+    async def _fetch(self, user_id: str) -> Optional[Principal]:
+        user = await BaseRepository(User).find_one(User.id == user_id)
+        principal = (
+            Principal(id=str(user.id), role=role_for(user), is_active=user.is_active)
+            if user
+            else None
+        )
+        self._entries[user_id] = (time.monotonic(), principal)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return principal
+
+    async def _load(self, user_id: str) -> Optional[Principal]:
+        # Concurrent misses for one user share a single Mongo read; the
+        # principal is frozen, so handing every waiter the same one is safe.
+        return await self._flight.do(user_id, self._fetch, user_id)
+
+    async def _refresh(self, user_id: str) -> None:
+        try:
+            await self._load(user_id)
+        except Exception as e:
+            logger.warning(f"Principal refresh failed for {user_id}: {e}")
+        finally:
+            self._refreshing.pop(user_id, None)
+
+    async def get(self, user_id: str) -> Optional[Principal]:
+        entry = self._entries.get(user_id)
+        if entry:
+            self._entries.move_to_end(user_id)
+            age = time.monotonic() - entry[0]
+            if age < env.principal_cache_ttl_seconds:
+                return entry[1]
+            if age < env.principal_stale_ttl_seconds:
+                if user_id not in self._refreshing:
+                    self._refreshing[user_id] = asyncio.create_task(
+                        self._refresh(user_id)
+                    )
+                return entry[1]
+        return await self._load(user_id)
+
+    def evict(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+
+    async def invalidate(self, user_id: str) -> None:
+        """Drop the user's cached principal on every worker."""
+        self.evict(user_id)
+        await redis_pubsub_client.publish(PRINCIPAL_INVALIDATION_CHANNEL, user_id)
+
+    async def _listen(self) -> None:
+        pubsub = redis_pubsub_client.pubsub()
+        await pubsub.subscribe(PRINCIPAL_INVALIDATION_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    self.evict(message["data"])
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.close()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+            logger.info("Principal invalidation listener started.")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+principal_cache = PrincipalCache()
+
+
+def refresh_token_digest(refresh_token: str) -> str:
+    """Short digest stored in place of the raw refresh token (which lives in the cookie)."""
+    return hashlib.blake2b(refresh_token.encode(), digest_size=16).hexdigest()
+
+
+def compact_session_fields(
+    refresh_token_digest: str | None,
+    created_at: int | None,
+    expires_at: int | None,
+    metadata: dict | None,
+) -> dict[str, str | int]:
+    """
+    Compact hash layout for a session:
+        d  -> refresh token digest
+        c  -> created_at (epoch seconds)
+        e  -> expires_at (epoch seconds)
+        m:<key> -> metadata values (ip, user_agent, ...)
+    """
+    fields: dict[str, str | int] = {
+        "d": refresh_token_digest or "",
+        "c": created_at or 0,
+        "e": expires_at or 0,
+    }
+    for name, value in (metadata or {}).items():
+        if value is not None:
+            fields[f"{SESSION_META_FIELD_PREFIX}{name}"] = value
+    return fields
+
+
+def encode_session(
+    refresh_token: str, metadata: dict | None, ttl: int
+) -> dict[str, str | int]:
+    now = int(time.time())
+    return compact_session_fields(
+        refresh_token_digest(refresh_token), now, now + ttl, metadata
+    )
+
+
+def decode_session(fields: dict[str, str]) -> dict[str, Any]:
+    return {
+        "refresh_token_digest": fields.get("d"),
+        "created_at": int(fields["c"]) if "c" in fields else None,
+        "expires_at": int(fields["e"]) if "e" in fields else None,
+        "metadata": {
+            name[len(SESSION_META_FIELD_PREFIX) :]: value
+            for name, value in fields.items()
+            if name.startswith(SESSION_META_FIELD_PREFIX)
+        },
+    }
+
+
+def decode_legacy_session(data: str) -> dict[str, Any]:
+    """Normalize a legacy JSON-blob session into the compact session shape."""
+    legacy = json.loads(data)
+
+    def _epoch(value: str | None) -> int | None:
+        if not value:
+            return None
+        dt = datetime.fromisoformat(value)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return int(dt.timestamp())
+
+    refresh_token = legacy.get("refresh_token")
+    return {
+        "refresh_token_digest": (
+            refresh_token_digest(refresh_token) if refresh_token else None
+        ),
+        "created_at": _epoch(legacy.get("created_at")),
+        "expires_at": _epoch(legacy.get("expires_at")),
+        "metadata": legacy.get("metadata") or {},
+    }
+
+
+def session_matches(session: dict[str, Any], refresh_token: str) -> bool:
+    """Constant-time check of a presented refresh token against a stored session."""
+    digest = session.get("refresh_token_digest")
+    return bool(digest) and hmac.compare_digest(
+        digest, refresh_token_digest(refresh_token)
+    )
+
+
+async def _read_session(
+    key: str, client: Any = redis_client
+) -> Optional[dict[str, Any]]:
+    try:
+        fields = await client.hgetall(key)
+    except ResponseError:
+        # WRONGTYPE: the key still holds a legacy JSON blob.
+        data = await client.get(key)
+        return decode_legacy_session(data) if data else None
+    return decode_session(fields) if fields else None
+
+
 async def create_session(
     user_id: str,
     jti: str,
@@ -36,7 +306,7 @@ async def create_session(
     Args:
         user_id: The user's unique ID.
         jti: Unique ID for this refresh token (JWT ID).
-        refresh_token: The actual refresh token string.
+        refresh_token: The actual refresh token string (only its digest is stored).
         metadata: Optional details (IP, user_agent, etc.)
         ttl: Time-to-live in seconds.
     """
@@ -44,21 +314,20 @@ async def create_session(
         logger.error("Redis is not connected.")
         raise ConnectionError("Redis is not connected.")
     key = f"{SESSION_PREFIX}:{user_id}:{jti}"
-    session_data = {
-        "refresh_token": refresh_token,
-        "created_at": datetime.utcnow().isoformat(),
-        "expires_at": (datetime.utcnow() + timedelta(seconds=ttl)).isoformat(),
-        "metadata": metadata or {},
-    }
-    await redis_client.setex(key, ttl, json.dumps(session_data))
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping=encode_session(refresh_token, metadata, ttl))
+        pipe.expire(key, ttl)
+        await pipe.execute()
     return True
 
 
 async def get_session(user_id: str, jti: str) -> Optional[dict[str, Any]]:
-    """Retrieve a user's session from Redis."""
+    """
+    Retrieve a user's session from Redis (compact or legacy format).
+    Served by a replica when REDIS_REPLICA_READS is enabled.
+    """
     key = f"{SESSION_PREFIX}:{user_id}:{jti}"
-    data = await redis_client.get(key)
-    return json.loads(data) if data else None
+    return await _read_session(key, client=redis_read_client)
 
 
 async def rotate_session(
@@ -73,19 +342,24 @@ async def rotate_session(
     Rotate (replace) a refresh session with a new JTI and token.
     """
     old_key = f"{SESSION_PREFIX}:{user_id}:{old_jti}"
-    await redis_client.delete(old_key)
-
     new_key = f"{SESSION_PREFIX}:{user_id}:{new_jti}"
-    session_data = {
-        "refresh_token": new_refresh_token,
-        "created_at": datetime.utcnow().isoformat(),
-        "expires_at": (datetime.utcnow() + timedelta(seconds=ttl)).isoformat(),
-        "metadata": metadata or {},
-    }
-    await redis_client.setex(new_key, ttl, json.dumps(session_data))
+    # The two keys hash to different cluster slots, so no MULTI; the new
+    # session is written before the old one goes.
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hset(new_key, mapping=encode_session(new_refresh_token, metadata, ttl))
+        pipe.expire(new_key, ttl)
+        pipe.delete(old_key)
+        await pipe.execute()
     return True
 
 
+async def _session_keys(user_id: str) -> list[str]:
+    # SCAN rather than KEYS: it does not block Redis, and in cluster mode
+    # redis-py runs it against every primary instead of a single shard.
+    pattern = f"{SESSION_PREFIX}:{user_id}:*"
+    return [key async for key in redis_client.scan_iter(match=pattern, count=1000)]
+
+
 async def revoke_session(user_id: str, jti: str) -> bool:
     """Revoke a single session (logout single device)."""
     key = f"{SESSION_PREFIX}:{user_id}:{jti}"
@@ -95,8 +369,7 @@ async def revoke_session(user_id: str, jti: str) -> bool:
 
 async def revoke_all_sessions(user_id: str) -> int:
     """Revoke all sessions for a user (logout all devices)."""
-    pattern = f"{SESSION_PREFIX}:{user_id}:*"
-    keys = await redis_client.keys(pattern)
+    keys = await _session_keys(user_id)
     if keys:
         return await redis_client.delete(*keys)
     return 0
@@ -110,51 +383,75 @@ async def blacklist_token(jti: str, ttl: int = BLACKLIST_TTL) -> bool:
 
 
 async def is_token_blacklisted(jti: str) -> bool:
-    """Check if token's JTI is blacklisted."""
+    """
+    Check if token's JTI is blacklisted.
+    Served by a replica when REDIS_REPLICA_READS is enabled, so a blacklist
+    entry may take one replication delay to become visible.
+    """
     key = f"{BLACKLIST_PREFIX}:{jti}"
-    return bool(await redis_client.exists(key))
+    return bool(await redis_read_client.exists(key))
 
 
 async def list_active_sessions(user_id: str) -> list[dict[str, Any]]:
     """List all active sessions for a user."""
-    pattern = f"{SESSION_PREFIX}:{user_id}:*"
-    keys = await redis_client.keys(pattern)
+    keys = await _session_keys(user_id)
     sessions = []
     for key in keys:
-        data = await redis_client.get(key)
-        if data:
-            sessions.append(json.loads(data))
+        session = await _read_session(key)
+        if session:
+            sessions.append(session)
     return sessions
 
 
+async def touch_last_login(user_id: str) -> None:
+    """
+    Targeted $set rather than a document save: last_login is not part of any
+    cached view, so it should not bump the User collection version.
+    """
+    await User.find_one(User.id == user_id).update(Set({User.last_login: utc_now()}))
+
+
 async def user_login(data: dict, metadata: dict | None = None) -> dict:
     email = data.get("email", None)
     password = data.get("password", None)
     username = data.get("username", None)
+    account = email or username
+    ip = (metadata or {}).get("ip")
+    await check_login_allowed(account, ip)
+
     user_repo = BaseRepository(User)
     query = Or(User.email == email, User.username == username)
     user = await user_repo.find_one(query)
     if not user:
+        await register_login_failure(account, ip)
+        record_auth_event(EVENT_LOGIN_FAILED, metadata=metadata)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email or username is incorrect.",
         )
 
     if not verify_password(password=password, hashed=user.password):
+        await register_login_failure(account, ip)
+        record_auth_event(EVENT_LOGIN_FAILED, user_id=str(user.id), metadata=metadata)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Entered password is incorrect.",
         )
 
-    if user.is_superuser:
-        role = "admin"
-    else:
-        role = "user"
+    await clear_login_failures(account)
+    role = role_for(user)
 
     session_id = str(uuid.uuid4())
+    token_version = await get_token_version(str(user.id))
 
-    access_token = create_access_token(subject=str(user.id), token_version=1, role=role)
-    refresh_token = create_refresh_token(subject=str(user.id), session_id=session_id)
+    access_token = create_access_token(
+        subject=str(user.id), token_version=token_version, role=role
+    )
+    refresh_token = create_refresh_token(
+        subject=str(user.id),
+        session_id=session_id,
+        extra_claims={"ver": token_version},
+    )
 
     payload = verify_token(refresh_token, expected_type="refresh")
     refresh_jti = payload.get("jti")
@@ -169,6 +466,8 @@ async def user_login(data: dict, metadata: dict | None = None) -> dict:
         ttl=ttl,
     )
 
+    record_auth_event(EVENT_LOGIN, user_id=str(user.id), metadata=metadata)
+    task_queue.submit(touch_last_login, str(user.id))
     logger.info(
         "User logged in",
         extra={"extra": {"user_id": str(user.id), "session_id": session_id}},
@@ -182,7 +481,9 @@ async def user_login(data: dict, metadata: dict | None = None) -> dict:
     }
 
 
-async def logout_current_session(presented_refresh_token: str) -> bool:
+async def logout_current_session(
+    presented_refresh_token: str, metadata: dict | None = None
+) -> bool:
     payload = verify_token(presented_refresh_token, expected_type="refresh")
     jti = payload.get("jti")
     user_id = payload.get("sub")
@@ -197,6 +498,32 @@ async def logout_current_session(presented_refresh_token: str) -> bool:
     exp_ts = int(payload.get("exp", now_ts))
     remaining = max(1, exp_ts - now_ts)
     await blacklist_token(jti, ttl=remaining)
+    record_auth_event(EVENT_LOGOUT, user_id=user_id, metadata=metadata)
 
     logger.info("Session logged out", extra={"extra": {"user_id": user_id, "jti": jti}})
     return True
+
+
+async def logout_all_sessions(
+    presented_refresh_token: str, metadata: dict | None = None
+) -> int:
+    """
+    Logout everywhere: bump the user's token version so every outstanding
+    access and refresh token is rejected, without per-token blacklist entries.
+    """
+    payload = await ensure_token_version(
+        verify_token(presented_refresh_token, expected_type="refresh")
+    )
+    jti = payload.get("jti")
+    user_id = payload.get("sub")
+
+    version = await bump_token_version(user_id)
+    await revoke_session(user_id, jti)
+    await principal_cache.invalidate(user_id)
+    record_auth_event(EVENT_LOGOUT, user_id=user_id, metadata=metadata)
+
+    logger.info(
+        "All sessions logged out",
+        extra={"extra": {"user_id": user_id, "token_version": version}},
+    )
+    return version
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from app.core.config import env
+from app.api.auth.dependencies import get_current_user
+from app.api.auth.schemas import Principal
+from app.api.batch.schemas import BatchRequest, BatchItemResult
+from app.api.batch.services import run_batch
+from app.common.utils import SuccessResponse
+
+
+batch_router = APIRouter()
+
+
+@batch_router.post(
+    "",
+    response_model=SuccessResponse[list[BatchItemResult]],
+    status_code=status.HTTP_200_OK,
+)
+async def batch(
+    payload: BatchRequest,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+):
+    if len(payload.requests) > env.batch_max_requests:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch may contain at most {env.batch_max_requests} requests.",
+        )
+    results = await run_batch(request, payload.requests, current_user)
+    return SuccessResponse(data=results)
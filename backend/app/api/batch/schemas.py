@@ -0,0 +1,34 @@
+from typing import Any, Literal, Optional
+from pydantic import BaseModel, Field, field_validator
+
+from app.common.constants import Constants
+
+BATCH_PATH = f"{Constants.API_V1_URL}/batch"
+
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    path: str = Field(..., description="API path including query string")
+    headers: dict[str, str] = Field(default_factory=dict)
+    body: Optional[Any] = None
+
+    @field_validator("path")
+    @classmethod
+    def validate_path(cls, value: str) -> str:
+        if not value.startswith(f"{Constants.API_V1_URL}/"):
+            raise ValueError(f"Path must start with {Constants.API_V1_URL}/")
+        if value.split("?", 1)[0].rstrip("/") == BATCH_PATH:
+            raise ValueError("Batch requests cannot be nested.")
+        return value
+
+
+class BatchRequest(BaseModel):
+    requests: list[BatchItem] = Field(..., min_length=1)
+
+
+class BatchItemResult(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: dict[str, str] = Field(default_factory=dict)
+    body: Optional[Any] = None
@@ -0,0 +1,130 @@
+import json
+import asyncio
+from typing import Any
+from fastapi import Request, status
+
+from app.core.config import env
+from app.core.logging import get_logger
+from app.api.auth.schemas import Principal
+from app.api.batch.schemas import BatchItem, BatchItemResult
+
+logger = get_logger("app.api.batch.services")
+
+# Headers carried over from the batch request itself. Authorization is always
+# the batch's own token: sub-requests reuse its verified principal.
+FORWARDED_HEADERS = ("authorization", "user-agent", "x-forwarded-for", "x-real-ip")
+# Sub-responses are embedded in a JSON envelope, so never let them be encoded.
+BLOCKED_HEADERS = {"authorization", "accept-encoding", "content-length", "host"}
+RESULT_HEADERS = ("etag", "cache-control", "retry-after", "location")
+
+
+def _sub_scope(request: Request, item: BatchItem, principal: Principal, body: bytes):
+    path, _, query = item.path.partition("?")
+    headers = {
+        name: request.headers[name]
+        for name in FORWARDED_HEADERS
+        if name in request.headers
+    }
+    headers.update(
+        {
+            name.lower(): value
+            for name, value in item.headers.items()
+            if name.lower() not in BLOCKED_HEADERS
+        }
+    )
+    if body:
+        headers.setdefault("content-type", "application/json")
+        headers["content-length"] = str(len(body))
+
+    parent = request.scope
+    state = dict(parent.get("state") or {})
+    state.update(principal=principal, token=getattr(request.state, "token", None))
+    return {
+        "type": "http",
+        "asgi": parent.get("asgi", {"version": "3.0"}),
+        "http_version": parent.get("http_version", "1.1"),
+        "method": item.method,
+        "scheme": parent.get("scheme", "http"),
+        "server": parent.get("server"),
+        "client": parent.get("client"),
+        "root_path": parent.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [
+            (k.encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()
+        ],
+        "state": state,
+        # The batch request already holds an admission slot for its sub-requests.
+        "admitted": True,
+    }
+
+
+def _decode_body(body: bytes, content_type: str) -> Any:
+    if not body:
+        return None
+    if "json" in content_type:
+        try:
+            return json.loads(body)
+        except ValueError:
+            pass
+    return body.decode("utf-8", errors="replace")
+
+
+async def dispatch(
+    request: Request, item: BatchItem, principal: Principal
+) -> BatchItemResult:
+    """Run one sub-request through the application in-process."""
+    body = json.dumps(item.body).encode() if item.body is not None else b""
+    scope = _sub_scope(request, item, principal, body)
+    done = asyncio.Event()
+    response: dict[str, Any] = {"status": None, "headers": {}, "body": []}
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {
+                k.decode("latin-1").lower(): v.decode("latin-1")
+                for k, v in message.get("headers", [])
+            }
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception as e:
+        logger.error(f"Batch sub-request {item.method} {item.path} failed: {e}")
+        if response["status"] is None:
+            response["status"] = status.HTTP_500_INTERNAL_SERVER_ERROR
+    finally:
+        done.set()
+
+    headers = response["headers"]
+    return BatchItemResult(
+        id=item.id,
+        status=response["status"] or status.HTTP_500_INTERNAL_SERVER_ERROR,
+        headers={name: headers[name] for name in RESULT_HEADERS if name in headers},
+        body=_decode_body(b"".join(response["body"]), headers.get("content-type", "")),
+    )
+
+
+async def run_batch(
+    request: Request, items: list[BatchItem], principal: Principal
+) -> list[BatchItemResult]:
+    """Dispatch independent sub-requests concurrently, preserving their order."""
+    semaphore = asyncio.Semaphore(env.batch_concurrency)
+
+    async def run(item: BatchItem) -> BatchItemResult:
+        async with semaphore:
+            return await dispatch(request, item, principal)
+
+    return list(await asyncio.gather(*(run(item) for item in items)))
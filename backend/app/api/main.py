@@ -2,8 +2,14 @@ from fastapi import APIRouter
 
 from app.api.user.routers import user_router
 from app.api.auth.routers import auth_router
+from app.api.room.routers import room_router
+from app.api.media.routers import media_router
+from app.api.batch.routers import batch_router
 
 api_main_router = APIRouter()
 
 api_main_router.include_router(user_router, prefix="/user", tags=["User APIs"])
 api_main_router.include_router(auth_router, prefix="/auth", tags=["Auth APIs"])
+api_main_router.include_router(room_router, prefix="/room", tags=["Room APIs"])
+api_main_router.include_router(media_router, prefix="/media", tags=["Media APIs"])
+api_main_router.include_router(batch_router, prefix="/batch", tags=["Batch APIs"])
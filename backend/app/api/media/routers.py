@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query, status
+
+from app.api.media.schemas import MediaMetadata
+from app.api.media.services import media_service
+from app.api.auth.dependencies import get_current_user
+from app.common.utils import SuccessResponse
+
+
+media_router = APIRouter()
+
+
+@media_router.get(
+    "/metadata",
+    dependencies=[Depends(get_current_user)],
+    response_model=SuccessResponse[MediaMetadata],
+    status_code=status.HTTP_200_OK,
+)
+async def get_media_metadata(url: str = Query(..., description="Media page URL")):
+    metadata = await media_service.resolve(url)
+    return SuccessResponse(data=metadata)
@@ -0,0 +1,10 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+class MediaMetadata(BaseModel):
+    url: str
+    provider: str
+    title: Optional[str] = None
+    duration: Optional[float] = None
+    thumbnail_url: Optional[str] = None
@@ -0,0 +1,248 @@
+import re
+import abc
+import json
+import asyncio
+import hashlib
+import urllib.error
+import urllib.request
+from typing import Any, Optional
+from urllib.parse import urlencode, urlparse
+from fastapi import HTTPException, status
+
+from app.core.config import env
+from app.core.redis import redis_client
+from app.core.logging import get_logger
+from app.api.media.schemas import MediaMetadata
+from app.common.singleflight import SingleFlight
+
+logger = get_logger("app.api.media.services")
+
+MEDIA_CACHE_PREFIX = "media_meta"
+NEGATIVE_CACHE_MARKER = "__none__"
+MAX_RESPONSE_BYTES = 512 * 1024
+
+
+def host_allowed(url: str, hosts: tuple[str, ...]) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == h or host.endswith(f".{h}") for h in hosts)
+
+
+class _AllowListRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Follows a redirect only when its target is on the resolver's host list."""
+
+    def __init__(self, hosts: tuple[str, ...]):
+        self.hosts = hosts
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if not host_allowed(newurl, self.hosts):
+            # Unhandled, so urlopen raises HTTPError with the 3xx code.
+            return None
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+def _fetch(url: str, hosts: tuple[str, ...]) -> Optional[bytes]:
+    request = urllib.request.Request(
+        url, headers={"User-Agent": "Twogether-MediaResolver/1.0"}
+    )
+    opener = urllib.request.build_opener(_AllowListRedirectHandler(hosts))
+    try:
+        with opener.open(request, timeout=env.media_fetch_timeout_seconds) as response:
+            return response.read(MAX_RESPONSE_BYTES)
+    except urllib.error.HTTPError as e:
+        if 300 <= e.code < 500:
+            return None
+        raise
+
+
+async def http_get(url: str, hosts: tuple[str, ...]) -> Optional[bytes]:
+    """
+    GET a URL off the event loop. Redirects are followed only to `hosts`;
+    returns None for 4xx responses and refused redirects.
+    """
+    return await asyncio.to_thread(_fetch, url, hosts)
+
+
+class MediaResolver(abc.ABC):
+    """Base class for per-provider metadata resolvers."""
+
+    name: str = "generic"
+    hosts: tuple[str, ...] = ()
+
+    def matches(self, url: str) -> bool:
+        return host_allowed(url, self.hosts)
+
+    @abc.abstractmethod
+    async def resolve(self, url: str) -> Optional[MediaMetadata]:
+        """Metadata for `url`, or None when the provider does not know it."""
+
+
+class OEmbedResolver(MediaResolver):
+    """Resolves metadata through a provider's oEmbed endpoint."""
+
+    endpoint: str = ""
+
+    async def resolve(self, url: str) -> Optional[MediaMetadata]:
+        body = await http_get(
+            f"{self.endpoint}?{urlencode({'url': url, 'format': 'json'})}", self.hosts
+        )
+        if not body:
+            return None
+        data = json.loads(body)
+        return MediaMetadata(
+            url=url,
+            provider=self.name,
+            title=data.get("title"),
+            duration=data.get("duration"),
+            thumbnail_url=data.get("thumbnail_url"),
+        )
+
+
+class YouTubeResolver(OEmbedResolver):
+    """
+    YouTube's oEmbed response carries no duration, so `duration` is always
+    None here; the Data API would need a key this service does not hold.
+    """
+
+    name = "youtube"
+    hosts = ("youtube.com", "youtu.be")
+    endpoint = "https://www.youtube.com/oembed"
+
+
+class VimeoResolver(OEmbedResolver):
+    name = "vimeo"
+    hosts = ("vimeo.com",)
+    endpoint = "https://vimeo.com/api/oembed.json"
+
+
+_META_TAG = re.compile(
+    r'<meta\s+[^>]*(?:property|name)=["\']([^"\']+)["\'][^>]*content=["\']([^"\']*)["\']',
+    re.IGNORECASE,
+)
+
+
+class OpenGraphResolver(MediaResolver):
+    """Resolves metadata from OpenGraph tags for providers without public oEmbed."""
+
+    async def resolve(self, url: str) -> Optional[MediaMetadata]:
+        body = await http_get(url, self.hosts)
+        if not body:
+            return None
+        tags = dict(_META_TAG.findall(body.decode("utf-8", errors="ignore")))
+        title = tags.get("og:title")
+        if not title:
+            return None
+        duration = tags.get("og:video:duration") or tags.get("video:duration")
+        return MediaMetadata(
+            url=url,
+            provider=self.name,
+            title=title,
+            duration=float(duration) if duration else None,
+            thumbnail_url=tags.get("og:image"),
+        )
+
+
+class TwitchResolver(OpenGraphResolver):
+    name = "twitch"
+    hosts = ("twitch.tv",)
+
+
+class LocalStubResolver(MediaResolver):
+    """
+    Offline resolver for development and tests: the URL itself must return a
+    JSON document with title, duration and thumbnail_url.
+    """
+
+    name = "stub"
+    hosts = ("localhost", "127.0.0.1")
+
+    async def resolve(self, url: str) -> Optional[MediaMetadata]:
+        body = await http_get(url, self.hosts)
+        if not body:
+            return None
+        data = json.loads(body)
+        return MediaMetadata(**{**data, "url": url, "provider": self.name})
+
+
+def normalize_url(url: str) -> str:
+    parsed = urlparse(url.strip())
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid media URL."
+        )
+    return parsed._replace(fragment="").geturl()
+
+
+class MediaMetadataService:
+    """
+    Resolves media metadata through the first matching provider resolver,
+    caching hits and misses in Redis and collapsing concurrent lookups for
+    the same URL into a single upstream fetch.
+    """
+
+    def __init__(self, resolvers: Optional[list[MediaResolver]] = None):
+        self.resolvers: list[MediaResolver] = resolvers or []
+        self._flight = SingleFlight("media.resolve")
+
+    def register(self, resolver: MediaResolver) -> None:
+        """Register a resolver ahead of the existing ones."""
+        self.resolvers.insert(0, resolver)
+
+    def _resolver_for(self, url: str) -> MediaResolver:
+        for resolver in self.resolvers:
+            if resolver.matches(url):
+                return resolver
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported media provider.",
+        )
+
+    @staticmethod
+    def _cache_key(url: str) -> str:
+        return f"{MEDIA_CACHE_PREFIX}:{hashlib.sha1(url.encode()).hexdigest()}"
+
+    async def _load(self, url: str, key: str) -> Optional[dict[str, Any]]:
+        cached = await redis_client.get(key)
+        if cached == NEGATIVE_CACHE_MARKER:
+            return None
+        if cached:
+            return json.loads(cached)
+
+        resolver = self._resolver_for(url)
+        try:
+            metadata = await resolver.resolve(url)
+        except Exception as e:
+            logger.warning(f"Media resolver '{resolver.name}' failed for {url}: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Media provider unavailable.",
+            )
+
+        if metadata is None:
+            await redis_client.setex(
+                key, env.media_negative_cache_ttl_seconds, NEGATIVE_CACHE_MARKER
+            )
+            return None
+
+        data = metadata.model_dump()
+        await redis_client.setex(key, env.media_cache_ttl_seconds, json.dumps(data))
+        return data
+
+    async def resolve(self, url: str) -> MediaMetadata:
+        url = normalize_url(url)
+        key = self._cache_key(url)
+
+        data = await self._flight.do(key, self._load, url, key)
+        if data is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Media metadata not found.",
+            )
+        return MediaMetadata(**data)
+
+
+media_service = MediaMetadataService(
+    resolvers=[YouTubeResolver(), VimeoResolver(), TwitchResolver()]
+)
+
+if env.media_stub_resolver_enabled:
+    media_service.register(LocalStubResolver())
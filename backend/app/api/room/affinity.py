@@ -0,0 +1,144 @@
+import time
+import bisect
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from app.core.config import env
+from app.core.redis import redis_client
+from app.core.logging import get_logger
+
+logger = get_logger("app.api.room.affinity")
+
+NODE_REGISTRY_KEY = "room_nodes"
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(), "big"
+    )
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes; a join or leave moves ~1/N of rooms."""
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = env.room_affinity_vnodes):
+        self.nodes = frozenset(nodes)
+        points = sorted(
+            (_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+class RoomAffinity:
+    """
+    Maps each room to one owning node so that, when clients follow the
+    routing hint, a room's members share a process and its events never
+    need to cross Redis.
+
+    A node is identified by its advertised ROOM_AFFINITY_URL, so every worker
+    behind one URL is the same ring node: a redirect may land on any of them,
+    and recycling a worker does not move rooms. Nodes heartbeat into a Redis
+    sorted set; every refresh rebuilds the ring when membership changed and
+    notifies listeners so rooms that moved can redirect their sockets to the
+    new owner.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = env.room_affinity_url,
+        heartbeat: float = env.room_affinity_heartbeat_seconds,
+        node_ttl: float = env.room_affinity_node_ttl_seconds,
+    ):
+        self.node_id = url or "local"
+        self.url = url
+        self.enabled = env.room_affinity_enabled and bool(url)
+        self.heartbeat = heartbeat
+        self.node_ttl = node_ttl
+        self.ring = HashRing([self.node_id])
+        self.rebalances = 0
+        self._listeners: list[Callable[[], Awaitable[None]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def on_rebalance(self, listener: Callable[[], Awaitable[None]]) -> None:
+        self._listeners.append(listener)
+
+    def owner(self, room_id: str) -> str:
+        return self.ring.owner(room_id) or self.node_id
+
+    def is_local(self, room_id: str) -> bool:
+        return not self.enabled or self.owner(room_id) == self.node_id
+
+    def route(self, room_id: str) -> dict[str, Any]:
+        owner = self.owner(room_id)
+        return {
+            "room_id": room_id,
+            "node": owner,
+            "url": owner if self.enabled else None,
+            "local": owner == self.node_id or not self.enabled,
+        }
+
+    async def refresh(self) -> bool:
+        """Heartbeat, drop dead nodes, and rebuild the ring. Returns True on change."""
+        now = time.time()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.zadd(NODE_REGISTRY_KEY, {self.node_id: now})
+            pipe.zremrangebyscore(NODE_REGISTRY_KEY, "-inf", now - self.node_ttl)
+            pipe.zrange(NODE_REGISTRY_KEY, 0, -1)
+            *_, nodes = await pipe.execute()
+
+        if frozenset(nodes) == self.ring.nodes:
+            return False
+        self.ring = HashRing(nodes)
+        self.rebalances += 1
+        logger.info(f"Room ring rebalanced across {len(nodes)} nodes.")
+        for listener in self._listeners:
+            try:
+                await listener()
+            except Exception as e:
+                logger.error(f"Rebalance listener failed: {e}")
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Room affinity refresh failed: {e}")
+            await asyncio.sleep(self.heartbeat)
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Room affinity enabled for node {self.node_id} ({self.url}).")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # No explicit ZREM: other workers behind the same URL may still be
+        # serving it. The entry ages out after ROOM_AFFINITY_NODE_TTL_SECONDS.
+        logger.info("Room affinity stopped.")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "node": self.node_id,
+            "nodes": len(self.ring.nodes),
+            "rebalances": self.rebalances,
+        }
+
+
+room_affinity = RoomAffinity()
@@ -0,0 +1,132 @@
+import json
+import struct
+from typing import Any, Union
+
+Frame = Union[str, bytes]
+
+BINARY_SUBPROTOCOL = "streamdock.bin.v1"
+JSON_SUBPROTOCOL = "streamdock.json.v1"
+
+OP_PLAY = 0x01
+OP_PAUSE = 0x02
+OP_SEEK = 0x03
+OP_CLOCK_SYNC = 0x10
+OP_HEARTBEAT = 0x11
+OP_JSON = 0x7F
+
+PLAYBACK_OPCODES = {"play": OP_PLAY, "pause": OP_PAUSE, "seek": OP_SEEK}
+PLAYBACK_TYPES = {op: name for name, op in PLAYBACK_OPCODES.items()}
+
+# Client -> server playback: position.
+_CLIENT_PLAYBACK = struct.Struct("!Bd")
+# Server -> client playback: version, position, server_ts, effective_at, user id length.
+_SERVER_PLAYBACK = struct.Struct("!BIdddB")
+_CLIENT_CLOCK = struct.Struct("!Bd")
+_SERVER_CLOCK = struct.Struct("!Bddd")
+
+
+class JsonCodec:
+    """Default text-frame codec (one JSON object per frame)."""
+
+    name = JSON_SUBPROTOCOL
+    binary = False
+
+    def encode(self, message: dict[str, Any]) -> Frame:
+        return json.dumps(message, separators=(",", ":"))
+
+    def decode(self, data: Frame) -> Any:
+        return json.loads(data)
+
+
+class BinaryCodec:
+    """
+    Compact binary frames for the hot room-socket messages.
+
+    Playback events, clock sync and heartbeats use fixed struct layouts
+    (a stamped playback event is 30 bytes plus the user id instead of
+    ~150 bytes of JSON); anything else is an OP_JSON frame carrying UTF-8 JSON.
+    All numbers are big-endian.
+    """
+
+    name = BINARY_SUBPROTOCOL
+    binary = True
+
+    def encode(self, message: dict[str, Any]) -> Frame:
+        message_type = message.get("type")
+        if message_type in PLAYBACK_OPCODES and _is_stamped(message):
+            user_id = str(message["user_id"]).encode()
+            if len(user_id) <= 255 and message["v"] < 2**32:
+                return (
+                    _SERVER_PLAYBACK.pack(
+                        PLAYBACK_OPCODES[message_type],
+                        message["v"],
+                        message["position"],
+                        message["server_ts"],
+                        message["effective_at"],
+                        len(user_id),
+                    )
+                    + user_id
+                )
+        if message_type in PLAYBACK_OPCODES and message.keys() == {"type", "position"}:
+            return _CLIENT_PLAYBACK.pack(
+                PLAYBACK_OPCODES[message_type], message["position"]
+            )
+        if message_type == "clock_sync" and {"t0", "t1", "t2"} <= message.keys():
+            return _SERVER_CLOCK.pack(
+                OP_CLOCK_SYNC, message["t0"], message["t1"], message["t2"]
+            )
+        if message_type == "clock_sync" and message.keys() == {"type", "t0"}:
+            return _CLIENT_CLOCK.pack(OP_CLOCK_SYNC, message["t0"])
+        if message_type == "heartbeat" and len(message) == 1:
+            return bytes((OP_HEARTBEAT,))
+        return bytes((OP_JSON,)) + json.dumps(message, separators=(",", ":")).encode()
+
+    def decode(self, data: Frame) -> Any:
+        if isinstance(data, str) or not data:
+            return json.loads(data or "null")
+        opcode = data[0]
+        if opcode in PLAYBACK_TYPES:
+            if len(data) == _CLIENT_PLAYBACK.size:
+                _, position = _CLIENT_PLAYBACK.unpack(data)
+                return {"type": PLAYBACK_TYPES[opcode], "position": position}
+            _, v, position, server_ts, effective_at, uid_len = (
+                _SERVER_PLAYBACK.unpack_from(data)
+            )
+            return {
+                "type": PLAYBACK_TYPES[opcode],
+                "v": v,
+                "position": position,
+                "server_ts": server_ts,
+                "effective_at": effective_at,
+                "user_id": data[_SERVER_PLAYBACK.size :][:uid_len].decode(),
+            }
+        if opcode == OP_CLOCK_SYNC:
+            if len(data) == _CLIENT_CLOCK.size:
+                return {"type": "clock_sync", "t0": _CLIENT_CLOCK.unpack(data)[1]}
+            _, t0, t1, t2 = _SERVER_CLOCK.unpack(data)
+            return {"type": "clock_sync", "t0": t0, "t1": t1, "t2": t2}
+        if opcode == OP_HEARTBEAT:
+            return {"type": "heartbeat"}
+        if opcode == OP_JSON:
+            return json.loads(data[1:])
+        raise ValueError(f"Unknown frame opcode {opcode:#x}")
+
+
+def _is_stamped(message: dict[str, Any]) -> bool:
+    return {"v", "position", "server_ts", "effective_at", "user_id"} <= message.keys()
+
+
+json_codec = JsonCodec()
+binary_codec = BinaryCodec()
+
+
+def negotiate(offered: list[str]) -> tuple[Any, str | None]:
+    """
+    Pick the codec for a socket from the client's Sec-WebSocket-Protocol
+    offer; clients that offer nothing get JSON with no subprotocol echoed.
+    """
+    if BINARY_SUBPROTOCOL in offered:
+        return binary_codec, BINARY_SUBPROTOCOL
+    if JSON_SUBPROTOCOL in offered:
+        return json_codec, JSON_SUBPROTOCOL
+    return json_codec, None
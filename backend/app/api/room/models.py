@@ -0,0 +1,43 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from app.common.models import BaseDocument
+
+
+class ChatMessage(BaseModel):
+    v: Optional[int] = None
+    user_id: str
+    text: str
+    ts: datetime
+
+
+class ChatBucket(BaseDocument):
+    """
+    Bucket-pattern chat history: a message goes to the bucket of the
+    CHAT_BUCKET_WINDOW_SECONDS window its timestamp falls in (`start` is the
+    window start); a window that outgrows CHAT_BUCKET_SIZE messages continues
+    in the next `page`. (room_id, start, page) is unique, so concurrent
+    writers cannot open duplicate buckets.
+    """
+
+    room_id: str
+    start: datetime
+    page: int = 0
+    end: datetime
+    message_count: int = 0
+    messages: list[ChatMessage] = Field(default_factory=list)
+
+    class Settings:
+        name = "CHAT_BUCKETS"
+        indexes = [
+            IndexModel(
+                [("room_id", ASCENDING), ("start", DESCENDING), ("page", DESCENDING)],
+                name="room_id_start_page",
+                unique=True,
+            )
+        ]
+
+    def __str__(self):
+        return "Chat Bucket Model."
@@ -0,0 +1,375 @@
+import os
+import json
+import socket
+import asyncio
+import weakref
+from typing import Any, Optional
+from fastapi import WebSocket
+
+from app.core.config import env
+from app.core.redis import redis_pubsub_client
+from app.core.logging import get_logger
+from app.api.room.codec import Frame, json_codec
+from app.api.room.state import room_state
+from app.api.room.affinity import room_affinity
+
+logger = get_logger("app.api.room.realtime")
+
+ROOM_CHANNEL_PREFIX = "room_events"
+ROOM_NODE_CHANNEL_PREFIX = "room_node"
+ROOM_REDIRECT_CLOSE_CODE = 4001
+
+
+def room_channel(room_id: str) -> str:
+    return f"{ROOM_CHANNEL_PREFIX}:{room_id}"
+
+
+class RoomConnectionManager:
+    """
+    Tracks the room sockets held by this worker and fans room events out.
+
+    Events always go straight to local sockets. They cross Redis pub/sub only
+    when another worker has members in the room: when its first member
+    connects, a worker subscribes to the room's channel and then joins the
+    room's node set (see RoomStateStore), and the script that versions each
+    event reports whether any other worker is in that set. Redis traffic
+    therefore grows with cross-worker rooms rather than with all rooms.
+    """
+
+    def __init__(self, subscribe_timeout: float = 2.0):
+        # Per process, unlike the affinity node: workers behind one URL still
+        # need each other's events.
+        self.node_id = f"{socket.gethostname()}-{os.getpid()}"
+        # room id -> socket -> the codec negotiated for that socket
+        self._local: dict[str, dict[WebSocket, Any]] = {}
+        # Serializes a room's first-join / last-leave transitions.
+        self._room_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+        self._confirmations: dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._pubsub = None
+        self.subscribe_timeout = subscribe_timeout
+        self.local_publishes = 0
+        self.redis_publishes = 0
+        self.listener_restarts = 0
+
+    def _room_lock(self, room_id: str) -> asyncio.Lock:
+        lock = self._room_locks.get(room_id)
+        if lock is None:
+            lock = self._room_locks[room_id] = asyncio.Lock()
+        return lock
+
+    async def connect(
+        self, room_id: str, websocket: WebSocket, codec: Any = json_codec
+    ) -> None:
+        """
+        Register a socket. Returns once this worker receives the room's remote
+        events, so the caller can read the snapshot without missing any.
+        """
+        async with self._room_lock(room_id):
+            first = room_id not in self._local
+            self._local.setdefault(room_id, {})[websocket] = codec
+            if first:
+                await self._subscribe(room_id)
+                await room_state.add_node(room_id, self.node_id)
+
+    async def disconnect(self, room_id: str, websocket: WebSocket) -> None:
+        async with self._room_lock(room_id):
+            sockets = self._local.get(room_id)
+            if sockets is None:
+                return
+            sockets.pop(websocket, None)
+            if sockets:
+                return
+            self._local.pop(room_id, None)
+            try:
+                await room_state.remove_node(room_id, self.node_id)
+            except Exception as e:
+                logger.warning(f"Failed to leave node set of room {room_id}: {e}")
+            if self._pubsub is not None:
+                try:
+                    await self._pubsub.unsubscribe(room_channel(room_id))
+                except Exception as e:
+                    logger.warning(f"Failed to unsubscribe from room {room_id}: {e}")
+
+    async def _subscribe(self, room_id: str) -> None:
+        """Subscribe to the room channel and wait for Redis to confirm it."""
+        if self._pubsub is None:
+            # The listener is (re)starting and subscribes every local room.
+            return
+        channel = room_channel(room_id)
+        confirmed = asyncio.get_running_loop().create_future()
+        self._confirmations[channel] = confirmed
+        try:
+            await self._pubsub.subscribe(channel)
+            await asyncio.wait_for(confirmed, timeout=self.subscribe_timeout)
+        except Exception as e:
+            logger.warning(f"Subscription to room {room_id} not confirmed: {e}")
+        finally:
+            self._confirmations.pop(channel, None)
+
+    def local_count(self, room_id: str) -> int:
+        return len(self._local.get(room_id, ()))
+
+    async def publish(
+        self, room_id: str, message: dict[str, Any], remote: bool = True
+    ) -> None:
+        """
+        Publish an event to every member of the room: local sockets directly,
+        and other workers over Redis when `remote` says any hold members.
+        """
+        data = json.dumps(message)
+        await self.broadcast_local(room_id, data)
+        if remote:
+            self.redis_publishes += 1
+            await redis_pubsub_client.publish(
+                room_channel(room_id), f"{self.node_id}\n{data}"
+            )
+        else:
+            self.local_publishes += 1
+
+    async def broadcast_local(self, room_id: str, data: str) -> None:
+        """Send a published JSON event to local members, encoding once per codec."""
+        sockets = list(self._local.get(room_id, {}).items())
+        if not sockets:
+            return
+        frames: dict[str, Frame] = {json_codec.name: data}
+        message = None
+        sends = []
+        for ws, codec in sockets:
+            if codec.name not in frames:
+                message = message if message is not None else json.loads(data)
+                frames[codec.name] = codec.encode(message)
+            frame = frames[codec.name]
+            sends.append(ws.send_bytes(frame) if codec.binary else ws.send_text(frame))
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        members = self._local.get(room_id, {})
+        for (ws, _), result in zip(sockets, results):
+            if isinstance(result, Exception):
+                # Stop sending to it; the socket's own handler calls disconnect,
+                # which leaves the room if it was the last member.
+                members.pop(ws, None)
+
+    async def redirect_moved_rooms(self) -> int:
+        """After a rebalance, send members of rooms this node no longer owns to the owner."""
+        moved = 0
+        for room_id in [r for r in self._local if not room_affinity.is_local(r)]:
+            route = room_affinity.route(room_id)
+            if not route["url"]:
+                continue
+            for ws, codec in list(self._local.get(room_id, {}).items()):
+                try:
+                    await send_redirect(ws, codec, route)
+                except Exception:
+                    pass
+                moved += 1
+        return moved
+
+    async def _handle(self, message: dict[str, Any]) -> None:
+        if message.get("type") == "subscribe":
+            confirmed = self._confirmations.get(message["channel"])
+            if confirmed is not None and not confirmed.done():
+                confirmed.set_result(True)
+            return
+        if message.get("type") != "message":
+            return
+        channel = message["channel"]
+        if not channel.startswith(f"{ROOM_CHANNEL_PREFIX}:"):
+            return
+        origin, _, data = message["data"].partition("\n")
+        if origin == self.node_id:
+            return
+        await self.broadcast_local(channel.split(":", 1)[1], data)
+
+    async def _listen(self) -> None:
+        """Receive remote room events; reconnects (and resubscribes) on failure."""
+        backoff = 0.5
+        while True:
+            pubsub = redis_pubsub_client.pubsub()
+            try:
+                # The node channel keeps the connection subscribed while no room is.
+                await pubsub.subscribe(f"{ROOM_NODE_CHANNEL_PREFIX}:{self.node_id}")
+                if self._local:
+                    await pubsub.subscribe(*(room_channel(r) for r in self._local))
+                self._pubsub = pubsub
+                backoff = 0.5
+                async for message in pubsub.listen():
+                    await self._handle(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Events published while disconnected are lost here; clients
+                # see the version gap and resync with since=.
+                self.listener_restarts += 1
+                logger.error(f"Room event listener failed, restarting: {e}")
+            finally:
+                self._pubsub = None
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 10.0)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+            room_affinity.on_rebalance(self.redirect_moved_rooms)
+            logger.info("Room event listener started.")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Room event listener stopped.")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "local_rooms": len(self._local),
+            "local_sockets": sum(len(sockets) for sockets in self._local.values()),
+            "local_publishes": self.local_publishes,
+            "redis_publishes": self.redis_publishes,
+            "listener_restarts": self.listener_restarts,
+        }
+
+
+async def send_redirect(
+    websocket: WebSocket, codec: Any, route: dict[str, Any]
+) -> None:
+    """Point the client at the room's owning node and close the socket."""
+    query = websocket.url.query
+    url = f"{route['url'].rstrip('/')}{websocket.url.path}" + (
+        f"?{query}" if query else ""
+    )
+    frame = codec.encode({"type": "redirect", "node": route["node"], "url": url})
+    if codec.binary:
+        await websocket.send_bytes(frame)
+    else:
+        await websocket.send_text(frame)
+    await websocket.close(code=ROOM_REDIRECT_CLOSE_CODE)
+
+
+room_manager = RoomConnectionManager()
+
+
+async def record_and_publish(room_id: str, event: dict[str, Any]) -> dict[str, Any]:
+    """Version the event in the room state, then fan it out."""
+    delta, remote = await room_state.apply(room_id, event, room_manager.node_id)
+    await room_manager.publish(room_id, delta, remote)
+    return delta
+
+
+def merge_playback(current: dict[str, Any], incoming: dict[str, Any]) -> dict[str, Any]:
+    """
+    Fold a newer playback event into a pending one. The result carries the
+    newest position and stamps; a seek keeps the pending play/pause type so
+    the merged event still lands in the right play state.
+    """
+    if incoming["type"] == "seek" and current["type"] in ("play", "pause"):
+        return {**incoming, "type": current["type"]}
+    return incoming
+
+
+class PlaybackCoalescer:
+    """
+    Coalesces bursts of playback events per room. The first event of a burst
+    is published at once and opens a ROOM_COALESCE_WINDOW_MS window; events
+    arriving inside it are merged and published as one when it closes (which
+    opens the next window), so a lone play or pause pays no delay while
+    scrubbing a seek bar costs one version per window instead of dozens.
+
+    Other room events must call `flush` before they are recorded, so they are
+    versioned after any playback event the room is still holding.
+    """
+
+    def __init__(self, window_ms: int = env.room_coalesce_window_ms):
+        self.window = window_ms / 1000
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        # Serializes this worker's playback publishes per room.
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._flushes: set[asyncio.Task] = set()
+        self.received = 0
+        self.published = 0
+
+    async def submit(self, room_id: str, event: dict[str, Any]) -> None:
+        self.received += 1
+        if self.window <= 0:
+            await self._publish(room_id, event)
+            return
+        if room_id in self._timers:
+            pending = self._pending.get(room_id)
+            self._pending[room_id] = (
+                merge_playback(pending, event) if pending else event
+            )
+            return
+        self._open_window(room_id)
+        await self._publish(room_id, event)
+
+    async def flush(self, room_id: str) -> None:
+        """Publish the room's held playback event (if any) before returning."""
+        lock = self._locks.get(room_id)
+        if lock is None:
+            return
+        async with lock:
+            event = self._pending.pop(room_id, None)
+            if event is not None:
+                await self._record(room_id, event)
+
+    def _open_window(self, room_id: str) -> None:
+        self._timers[room_id] = asyncio.get_running_loop().call_later(
+            self.window, self._schedule_close, room_id
+        )
+
+    def _schedule_close(self, room_id: str) -> None:
+        task = asyncio.create_task(self._close_window(room_id))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _close_window(self, room_id: str) -> None:
+        self._timers.pop(room_id, None)
+        if room_id in self._pending:
+            # Still scrubbing: publish the merged event and keep coalescing.
+            self._open_window(room_id)
+            await self.flush(room_id)
+            return
+        lock = self._locks.get(room_id)
+        if lock is not None and not lock.locked():
+            self._locks.pop(room_id, None)
+
+    async def _publish(self, room_id: str, event: dict[str, Any]) -> None:
+        async with self._locks.setdefault(room_id, asyncio.Lock()):
+            await self._record(room_id, event)
+
+    async def _record(self, room_id: str, event: dict[str, Any]) -> None:
+        self.published += 1
+        try:
+            await record_and_publish(room_id, event)
+        except Exception as e:
+            logger.error(f"Failed to publish playback for room {room_id}: {e}")
+
+    async def stop(self) -> None:
+        """Publish whatever is still pending."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        await asyncio.gather(
+            *(self.flush(room_id) for room_id in list(self._pending)),
+            *self._flushes,
+            return_exceptions=True,
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "received": self.received,
+            "published": self.published,
+            "pending_rooms": len(self._pending),
+        }
+
+
+playback_coalescer = PlaybackCoalescer()
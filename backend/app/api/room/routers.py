@@ -0,0 +1,264 @@
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+import struct
+from typing import Any, Optional
+from pydantic import ValidationError
+
+from app.api.room.schemas import (
+    PresenceView,
+    ClockSyncView,
+    PlaybackEvent,
+    MediaChangeEvent,
+    ChatEvent,
+    RoomSnapshot,
+    RoomRoute,
+    ChatHistoryPage,
+)
+from app.api.room.services import (
+    PLAYBACK_EVENTS,
+    presence_tracker,
+    server_time_ms,
+    clock_sync_reply,
+    stamp_playback_event,
+    append_chat_message,
+    chat_history,
+)
+from app.api.room.codec import negotiate
+from app.api.room.affinity import room_affinity
+from app.api.room.realtime import (
+    room_manager,
+    record_and_publish,
+    playback_coalescer,
+    send_redirect,
+)
+from app.api.room.state import room_state
+from app.api.auth.services import verify_access_token
+from app.api.auth.dependencies import get_current_user
+from app.core.logging import get_logger
+from app.common.utils import SuccessResponse
+
+
+room_router = APIRouter()
+
+ROOM_EVENT_SCHEMAS = {
+    **{event_type: PlaybackEvent for event_type in PLAYBACK_EVENTS},
+    "media": MediaChangeEvent,
+    "chat": ChatEvent,
+}
+
+logger = get_logger("app.api.room.routers")
+
+
+@room_router.get(
+    "/clock",
+    response_model=ClockSyncView,
+    status_code=status.HTTP_200_OK,
+)
+async def clock_sync(t0: float = Query(..., description="Client send time (ms)")):
+    """
+    Clock-sync exchange for clients that are not connected to a room socket yet.
+    """
+    return clock_sync_reply(t0=t0, t1=server_time_ms())
+
+
+@room_router.get(
+    "/{room_id}/presence",
+    dependencies=[Depends(get_current_user)],
+    response_model=SuccessResponse[PresenceView],
+    status_code=status.HTTP_200_OK,
+)
+async def get_room_presence(room_id: str):
+    members = await presence_tracker.members(room_id)
+    presence = PresenceView(room_id=room_id, count=len(members), members=members)
+    return SuccessResponse(data=presence)
+
+
+@room_router.get(
+    "/{room_id}/state",
+    dependencies=[Depends(get_current_user)],
+    response_model=SuccessResponse[RoomSnapshot],
+    status_code=status.HTTP_200_OK,
+)
+async def get_room_state(room_id: str):
+    snapshot = await room_state.snapshot(room_id)
+    return SuccessResponse(data=snapshot)
+
+
+@room_router.get(
+    "/{room_id}/route",
+    dependencies=[Depends(get_current_user)],
+    response_model=SuccessResponse[RoomRoute],
+    status_code=status.HTTP_200_OK,
+)
+async def get_room_route(room_id: str):
+    """Which node owns the room, so clients can connect there directly."""
+    return SuccessResponse(data=room_affinity.route(room_id))
+
+
+@room_router.get(
+    "/{room_id}/chat",
+    dependencies=[Depends(get_current_user)],
+    response_model=SuccessResponse[ChatHistoryPage],
+    status_code=status.HTTP_200_OK,
+)
+async def get_chat_history(
+    room_id: str,
+    before: Optional[float] = Query(
+        None, description="Server time (ms) of the oldest message already loaded"
+    ),
+    before_v: Optional[int] = Query(
+        None, description="Version of the oldest message already loaded"
+    ),
+    limit: int = Query(50, ge=1, le=200),
+):
+    page = await chat_history(room_id, before=before, before_v=before_v, limit=limit)
+    return SuccessResponse(data=page)
+
+
+async def _send(websocket: WebSocket, codec: Any, message: dict) -> None:
+    frame = codec.encode(message)
+    if codec.binary:
+        await websocket.send_bytes(frame)
+    else:
+        await websocket.send_text(frame)
+
+
+async def _receive(websocket: WebSocket, codec: Any) -> Any:
+    """Next decoded client message, or None for a frame that cannot be decoded."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    data = message.get("bytes")
+    try:
+        return codec.decode(data if data is not None else message.get("text"))
+    except (ValueError, struct.error):
+        return None
+
+
+async def _send_initial_state(
+    websocket: WebSocket, codec: Any, room_id: str, since: Optional[int]
+) -> None:
+    """
+    Missed deltas for a reconnect that the ring still covers, else a full
+    snapshot. The socket is already subscribed, so live events may overlap
+    what is sent here; clients drop anything with v <= the version they hold.
+    """
+    if since is not None:
+        deltas = await room_state.deltas_since(room_id, since)
+        if deltas is not None:
+            await _send(websocket, codec, {"type": "deltas", "events": deltas})
+            return
+    snapshot = await room_state.snapshot(room_id)
+    await _send(websocket, codec, {"type": "snapshot", **snapshot})
+
+
+@room_router.websocket("/{room_id}/ws")
+async def room_socket(
+    websocket: WebSocket,
+    room_id: str,
+    token: str = Query(...),
+    since: Optional[int] = Query(None, ge=0, description="Last room version seen"),
+    stay: bool = Query(False, description="Skip the room-affinity redirect"),
+):
+    """
+    Room socket. On connect the server sends {"type": "snapshot", ...} or,
+    when `since` is given and still covered, {"type": "deltas", "events": [...]}.
+    Every fanned-out event carries the room version `v`. Clients send:
+      {"type": "clock_sync", "t0": <ms>}      -> {"type": "clock_sync", t0, t1, t2}
+      {"type": "play"|"pause"|"seek", "position": <s>}
+                                              -> fanned out with server_ts/effective_at
+      {"type": "media", "url": <url>}         -> fanned out, resets playback
+      {"type": "chat", "text": <text>}        -> fanned out, kept in the chat tail
+      {"type": "heartbeat"}                   -> presence only
+
+    Offering the "streamdock.bin.v1" subprotocol switches the socket to the
+    compact binary codec (app.api.room.codec); otherwise frames are JSON text.
+    Playback bursts are coalesced per room: the first event is fanned out at
+    once, later ones within ROOM_COALESCE_WINDOW_MS are merged into one.
+
+    With room affinity enabled, a socket that lands on a node that does not
+    own the room gets {"type": "redirect", "node", "url"} and close code 4001;
+    clients reconnect to `url` (or pass stay=true to be served here anyway).
+    """
+    try:
+        payload = await verify_access_token(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    user_id = payload.get("sub")
+
+    codec, subprotocol = negotiate(websocket.scope.get("subprotocols", []))
+    await websocket.accept(subprotocol=subprotocol)
+    if not room_affinity.is_local(room_id) and not stay:
+        route = room_affinity.route(room_id)
+        if route["url"]:
+            await send_redirect(websocket, codec, route)
+            return
+    await room_manager.connect(room_id, websocket, codec)
+    await presence_tracker.join(room_id, user_id)
+    await _send_initial_state(websocket, codec, room_id, since)
+    await playback_coalescer.flush(room_id)
+    await record_and_publish(
+        room_id, {"type": "join", "user_id": user_id, "server_ts": server_time_ms()}
+    )
+
+    try:
+        while True:
+            message = await _receive(websocket, codec)
+            received_at = server_time_ms()
+            presence_tracker.heartbeat(room_id, user_id)
+            message_type = message.get("type") if isinstance(message, dict) else None
+
+            if message_type == "clock_sync":
+                reply = clock_sync_reply(t0=message.get("t0", 0), t1=received_at)
+                await _send(websocket, codec, {"type": "clock_sync", **reply})
+
+            elif message_type in ROOM_EVENT_SCHEMAS:
+                try:
+                    event = ROOM_EVENT_SCHEMAS[message_type](**message).model_dump()
+                except ValidationError:
+                    await _send(
+                        websocket,
+                        codec,
+                        {"type": "error", "detail": f"Invalid {message_type} event"},
+                    )
+                    continue
+                if message_type in PLAYBACK_EVENTS:
+                    event = stamp_playback_event(event, user_id, received_at)
+                    await playback_coalescer.submit(room_id, event)
+                else:
+                    event.update(user_id=user_id, server_ts=received_at)
+                    # A held seek must not be versioned after (and applied to)
+                    # the media change that followed it.
+                    await playback_coalescer.flush(room_id)
+                    delta = await record_and_publish(room_id, event)
+                    if message_type == "chat":
+                        # Inline rather than through the task queue, which
+                        # sheds work under load; history must not lose messages.
+                        await append_chat_message(room_id, delta)
+
+            elif message is None:
+                await _send(
+                    websocket, codec, {"type": "error", "detail": "Malformed frame"}
+                )
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await room_manager.disconnect(room_id, websocket)
+        await presence_tracker.leave(room_id, user_id)
+        try:
+            await playback_coalescer.flush(room_id)
+            await record_and_publish(
+                room_id,
+                {"type": "leave", "user_id": user_id, "server_ts": server_time_ms()},
+            )
+        except Exception as e:
+            logger.warning(f"Failed to record leave for room {room_id}: {e}")
+        logger.debug(f"User {user_id} left room {room_id}")
@@ -0,0 +1,61 @@
+from typing import Any, Literal, Optional
+from pydantic import BaseModel, Field
+
+
+class PresenceView(BaseModel):
+    room_id: str
+    count: int
+    members: list[str]
+
+
+class ClockSyncView(BaseModel):
+    t0: float
+    t1: float
+    t2: float
+
+
+class PlaybackEvent(BaseModel):
+    type: Literal["play", "pause", "seek"]
+    position: float = Field(..., ge=0)
+
+
+class MediaChangeEvent(BaseModel):
+    type: Literal["media"]
+    url: str = Field(..., max_length=2048)
+
+
+class ChatEvent(BaseModel):
+    type: Literal["chat"]
+    text: str = Field(..., min_length=1, max_length=1000)
+
+
+class RoomSnapshot(BaseModel):
+    room_id: str
+    v: int
+    media_url: Optional[str] = None
+    position: float
+    position_ts: Optional[float] = None
+    playing: bool
+    participants: list[str]
+    chat: list[dict[str, Any]]
+    server_ts: float
+
+
+class RoomRoute(BaseModel):
+    room_id: str
+    node: str
+    url: Optional[str] = None
+    local: bool
+
+
+class ChatHistoryMessage(BaseModel):
+    v: Optional[int] = None
+    user_id: str
+    text: str
+    server_ts: float
+
+
+class ChatHistoryPage(BaseModel):
+    messages: list[ChatHistoryMessage]
+    next_before: Optional[float] = None
+    next_before_v: Optional[int] = None
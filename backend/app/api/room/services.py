@@ -0,0 +1,340 @@
+import time
+import uuid
+import asyncio
+from typing import Any, Optional
+from datetime import datetime, timezone
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import env
+from app.core.redis import redis_client
+from app.core.logging import get_logger
+from app.api.room.models import ChatBucket
+
+logger = get_logger("app.api.room.services")
+
+PRESENCE_PREFIX = "presence"
+
+PLAYBACK_EVENTS = {"play", "pause", "seek"}
+
+
+def server_time_ms() -> float:
+    """High-resolution server wall clock in milliseconds since the epoch."""
+    return time.time_ns() / 1_000_000
+
+
+def clock_sync_reply(t0: float, t1: float) -> dict[str, float]:
+    """
+    NTP-style reply: the client keeps its own send (t0) and receive (t3)
+    times and derives offset = ((t1 - t0) + (t2 - t3)) / 2 and
+    round trip = (t3 - t0) - (t2 - t1).
+    """
+    return {"t0": t0, "t1": t1, "t2": server_time_ms()}
+
+
+def stamp_playback_event(
+    event: dict[str, Any], user_id: str, received_at: float
+) -> dict[str, Any]:
+    """
+    Attach server-time stamps so clients can schedule the action locally
+    instead of asking for a resync after it lands.
+    """
+    return {
+        **event,
+        "user_id": user_id,
+        "server_ts": received_at,
+        "effective_at": received_at + env.playback_lead_ms,
+    }
+
+
+# Drop one socket of a user; the user leaves the room with their last socket.
+# KEYS: presence sorted set, socket count hash. ARGV: user id.
+_LEAVE_SCRIPT = """
+if redis.call('HINCRBY', KEYS[2], ARGV[1], -1) > 0 then
+  return 0
+end
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('ZREM', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+def presence_keys(room_id: str) -> tuple[str, str]:
+    # `{room_id}` is a cluster hash tag: the leave script needs both keys.
+    prefix = f"{PRESENCE_PREFIX}:{{{room_id}}}"
+    return prefix, f"{prefix}:sockets"
+
+
+class PresenceTracker:
+    """
+    Room presence backed by one sorted set per room, scored by last heartbeat,
+    plus a hash counting each member's open sockets so a user with two tabs
+    stays present until the last one closes.
+
+    Heartbeats are buffered in memory and written with a single pipeline per
+    tick, expired members are evicted with ZREMRANGEBYSCORE, and join, leave
+    and count are O(log n) commands — no keyspace scans. Both keys carry a
+    TTL refreshed on join and flush, so rooms whose worker died expire.
+    """
+
+    def __init__(
+        self,
+        ttl: int = env.presence_ttl_seconds,
+        flush_interval: float = env.presence_flush_interval_seconds,
+        evict_interval: float = env.presence_evict_interval_seconds,
+        key_ttl: int = env.presence_key_ttl_seconds,
+    ):
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.evict_interval = evict_interval
+        self.key_ttl = key_ttl
+        self._pending: dict[str, dict[str, float]] = {}
+        self._rooms: set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._leave = redis_client.register_script(_LEAVE_SCRIPT)
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl
+
+    async def join(self, room_id: str, user_id: str) -> None:
+        """Mark a user present immediately and count the new socket."""
+        self._rooms.add(room_id)
+        members_key, sockets_key = presence_keys(room_id)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.zadd(members_key, {user_id: time.time()})
+            pipe.hincrby(sockets_key, user_id, 1)
+            pipe.expire(members_key, self.key_ttl)
+            pipe.expire(sockets_key, self.key_ttl)
+            await pipe.execute()
+
+    async def leave(self, room_id: str, user_id: str) -> None:
+        """Drop one socket; remove the user (ZREM) when it was their last."""
+        if await self._leave(keys=list(presence_keys(room_id)), args=[user_id]):
+            pending = self._pending.get(room_id)
+            if pending:
+                pending.pop(user_id, None)
+
+    def heartbeat(self, room_id: str, user_id: str) -> None:
+        """Buffer a heartbeat; it is written on the next flush tick."""
+        self._rooms.add(room_id)
+        self._pending.setdefault(room_id, {})[user_id] = time.time()
+
+    async def count(self, room_id: str) -> int:
+        """Number of members whose last heartbeat is within the TTL."""
+        members_key, _ = presence_keys(room_id)
+        return await redis_client.zcount(members_key, self._cutoff(), "+inf")
+
+    async def members(self, room_id: str) -> list[str]:
+        """Members whose last heartbeat is within the TTL."""
+        members_key, _ = presence_keys(room_id)
+        return await redis_client.zrangebyscore(members_key, self._cutoff(), "+inf")
+
+    async def flush(self) -> int:
+        """Write all buffered heartbeats in one pipelined round trip."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for room_id, heartbeats in pending.items():
+                members_key, sockets_key = presence_keys(room_id)
+                pipe.zadd(members_key, heartbeats)
+                pipe.expire(members_key, self.key_ttl)
+                pipe.expire(sockets_key, self.key_ttl)
+            await pipe.execute()
+        return sum(len(heartbeats) for heartbeats in pending.values())
+
+    async def evict_expired(self) -> int:
+        """Drop members whose heartbeat is older than the TTL from known rooms."""
+        if not self._rooms:
+            return 0
+        rooms = list(self._rooms)
+        cutoff = self._cutoff()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for room_id in rooms:
+                members_key, _ = presence_keys(room_id)
+                pipe.zremrangebyscore(members_key, "-inf", f"({cutoff}")
+                pipe.zcard(members_key)
+            results = await pipe.execute()
+        evicted = 0
+        for room_id, removed, remaining in zip(rooms, results[::2], results[1::2]):
+            evicted += removed
+            if not remaining and room_id not in self._pending:
+                self._rooms.discard(room_id)
+        return evicted
+
+    async def _run(self) -> None:
+        last_evict = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - last_evict >= self.evict_interval:
+                    last_evict = time.monotonic()
+                    evicted = await self.evict_expired()
+                    if evicted:
+                        logger.debug(f"Evicted {evicted} expired presence entries")
+            except Exception as e:
+                logger.error(f"Presence tick failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Presence tracker started.")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final presence flush failed: {e}")
+        logger.info("Presence tracker stopped.")
+
+
+presence_tracker = PresenceTracker()
+
+
+def _ms_to_datetime(ms: float) -> datetime:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+def _datetime_to_ms(dt: datetime) -> float:
+    # The driver returns naive UTC datetimes unless the client is tz_aware.
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp() * 1000
+
+
+def _window_start(ts: datetime) -> datetime:
+    window = env.chat_bucket_window_seconds
+    return _ms_to_datetime(ts.timestamp() // window * window * 1000)
+
+
+def _message_key(message: dict[str, Any]) -> tuple[float, float]:
+    """Sort/cursor key of a stored message: (server ms, room version)."""
+    v = message.get("v")
+    return _datetime_to_ms(message["ts"]), -1 if v is None else v
+
+
+async def append_chat_message(room_id: str, event: dict[str, Any]) -> None:
+    """
+    Push a chat event into the open page of its window's bucket, opening the
+    next page when that one is full. The $push keeps each bucket sorted by
+    (ts, v) however concurrent writers interleave, and the unique
+    (room_id, start, page) index turns a racing upsert into a DuplicateKeyError
+    that is retried against the now-existing bucket. The stored bucket is not
+    a cached view, so this bypasses BaseDocument.save.
+    """
+    ts = _ms_to_datetime(event["server_ts"])
+    start = _window_start(ts)
+    message = {
+        "v": event.get("v"),
+        "user_id": event["user_id"],
+        "text": event["text"],
+        "ts": ts,
+    }
+    collection = ChatBucket.get_pymongo_collection()
+
+    while True:
+        latest = await collection.find_one(
+            {"room_id": room_id, "start": start},
+            {"page": 1, "message_count": 1},
+            sort=[("page", -1)],
+        )
+        page = 0
+        if latest:
+            page = latest.get("page", 0) + (
+                latest["message_count"] >= env.chat_bucket_size
+            )
+        try:
+            await collection.update_one(
+                {
+                    "room_id": room_id,
+                    "start": start,
+                    "page": page,
+                    "message_count": {"$lt": env.chat_bucket_size},
+                },
+                {
+                    "$push": {
+                        "messages": {"$each": [message], "$sort": {"ts": 1, "v": 1}}
+                    },
+                    "$inc": {"message_count": 1},
+                    "$max": {"end": ts},
+                    "$setOnInsert": {"_id": str(uuid.uuid4())},
+                },
+                upsert=True,
+            )
+            return
+        except DuplicateKeyError:
+            # Another writer created or filled this page first.
+            continue
+
+
+async def _bucket_windows(cursor):
+    """Group a (start desc, page desc) bucket cursor into one message list per window."""
+    start, messages = None, []
+    async for bucket in cursor:
+        if messages and bucket["start"] != start:
+            yield messages
+            messages = []
+        start = bucket["start"]
+        messages.extend(bucket.get("messages", []))
+    if messages:
+        yield messages
+
+
+async def chat_history(
+    room_id: str,
+    before: Optional[float] = None,
+    before_v: Optional[int] = None,
+    limit: int = env.chat_history_page_size,
+) -> dict[str, Any]:
+    """
+    Up to `limit` messages older than the (before, before_v) cursor, oldest
+    first. Messages are ordered by (server ms, version), so messages sharing
+    a millisecond are neither skipped nor repeated across pages; without
+    `before_v` the cursor excludes the whole `before` millisecond. Pages
+    backwards window by window on the (room_id, start, page) index, so a
+    scroll-back usually reads one or two documents.
+    """
+    query: dict[str, Any] = {"room_id": room_id}
+    bound = None
+    if before is not None:
+        bound = (before, float("-inf") if before_v is None else before_v)
+        query["start"] = {"$lte": _ms_to_datetime(before)}
+
+    collected: list[dict[str, Any]] = []
+    cursor = (
+        ChatBucket.get_pymongo_collection()
+        .find(query, {"start": 1, "messages": 1})
+        .sort([("start", -1), ("page", -1)])
+        .batch_size(2)
+    )
+    async for messages in _bucket_windows(cursor):
+        messages = sorted(messages, key=_message_key)
+        if bound is not None:
+            messages = [m for m in messages if _message_key(m) < bound]
+        collected = messages[-(limit - len(collected)) :] + collected
+        if len(collected) >= limit:
+            break
+
+    next_before, next_before_v = None, None
+    if len(collected) >= limit:
+        next_before, next_before_v = _message_key(collected[0])
+    return {
+        "messages": [
+            {
+                "v": m.get("v"),
+                "user_id": m["user_id"],
+                "text": m["text"],
+                "server_ts": _datetime_to_ms(m["ts"]),
+            }
+            for m in collected
+        ],
+        "next_before": next_before,
+        "next_before_v": next_before_v,
+    }
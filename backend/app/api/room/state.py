@@ -0,0 +1,163 @@
+import json
+from typing import Any, Optional
+
+from app.core.config import env
+from app.core.redis import redis_client
+from app.core.logging import get_logger
+from app.api.room.services import presence_tracker, server_time_ms
+
+logger = get_logger("app.api.room.state")
+
+# Atomically bump the room version, apply the state fields, and append the
+# versioned delta to the ring buffer (and, for chat, to the chat tail).
+# Also returns how many other nodes have members in the room: a node joins
+# the set before reading its snapshot, so every event versioned after that
+# read sees it and is fanned out over Redis.
+# KEYS: state hash, delta list, chat list, node set.
+# ARGV: event json, ring size, chat tail size, is_chat, ttl, node id,
+#       field/value pairs...
+_APPLY_SCRIPT = """
+local v = redis.call('HINCRBY', KEYS[1], 'v', 1)
+if #ARGV > 6 then
+  redis.call('HSET', KEYS[1], unpack(ARGV, 7))
+end
+local delta = '{"v":' .. v .. ',' .. string.sub(ARGV[1], 2)
+redis.call('LPUSH', KEYS[2], delta)
+redis.call('LTRIM', KEYS[2], 0, tonumber(ARGV[2]) - 1)
+if ARGV[4] == '1' then
+  redis.call('LPUSH', KEYS[3], delta)
+  redis.call('LTRIM', KEYS[3], 0, tonumber(ARGV[3]) - 1)
+end
+for i = 1, 4 do
+  redis.call('EXPIRE', KEYS[i], tonumber(ARGV[5]))
+end
+local others = redis.call('SCARD', KEYS[4]) - redis.call('SISMEMBER', KEYS[4], ARGV[6])
+return {delta, others}
+"""
+
+
+def room_keys(room_id: str) -> tuple[str, str, str, str]:
+    # `{room_id}` is a cluster hash tag: all four keys live in one slot,
+    # which the apply script requires.
+    prefix = f"room:{{{room_id}}}"
+    return f"{prefix}:state", f"{prefix}:deltas", f"{prefix}:chat", f"{prefix}:nodes"
+
+
+def state_fields(event: dict[str, Any]) -> dict[str, Any]:
+    """State hash fields changed by an event (empty for join/leave)."""
+    event_type = event["type"]
+    if event_type in ("play", "pause", "seek"):
+        fields = {"position": event["position"], "position_ts": event["effective_at"]}
+        if event_type != "seek":
+            fields["playing"] = int(event_type == "play")
+        return fields
+    if event_type == "media":
+        return {
+            "media_url": event["url"],
+            "position": 0,
+            "position_ts": event["server_ts"],
+            "playing": 0,
+        }
+    return {}
+
+
+class RoomStateStore:
+    """
+    Versioned, authoritative room state in Redis.
+
+    Every accepted event bumps the room version and lands in a bounded ring
+    of deltas, so a joiner reads one snapshot and a reconnecting client
+    replays only what it missed — both independent of the room's age.
+    """
+
+    def __init__(
+        self,
+        ring_size: int = env.room_delta_ring_size,
+        chat_tail: int = env.room_chat_tail_size,
+        ttl: int = env.room_state_ttl_seconds,
+    ):
+        self.ring_size = ring_size
+        self.chat_tail = chat_tail
+        self.ttl = ttl
+        self._apply = redis_client.register_script(_APPLY_SCRIPT)
+
+    async def apply(
+        self, room_id: str, event: dict[str, Any], node_id: str
+    ) -> tuple[dict[str, Any], bool]:
+        """
+        Record an event. Returns it with its room version `v` attached, and
+        whether nodes other than `node_id` have members in the room.
+        """
+        args: list[Any] = [
+            json.dumps(event),
+            self.ring_size,
+            self.chat_tail,
+            int(event["type"] == "chat"),
+            self.ttl,
+            node_id,
+        ]
+        for field, value in state_fields(event).items():
+            args.extend((field, value))
+        delta, others = await self._apply(keys=list(room_keys(room_id)), args=args)
+        return json.loads(delta), int(others) > 0
+
+    async def add_node(self, room_id: str, node_id: str) -> None:
+        """Mark `node_id` as holding members of the room (before its snapshot read)."""
+        nodes_key = room_keys(room_id)[3]
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.sadd(nodes_key, node_id)
+            pipe.expire(nodes_key, self.ttl)
+            await pipe.execute()
+
+    async def remove_node(self, room_id: str, node_id: str) -> None:
+        await redis_client.srem(room_keys(room_id)[3], node_id)
+
+    async def snapshot(self, room_id: str) -> dict[str, Any]:
+        state_key, _, chat_key, _ = room_keys(room_id)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hgetall(state_key)
+            pipe.lrange(chat_key, 0, -1)
+            state, chat = await pipe.execute()
+        return {
+            "room_id": room_id,
+            "v": int(state.get("v", 0)),
+            "media_url": state.get("media_url"),
+            "position": float(state.get("position", 0)),
+            "position_ts": (
+                float(state["position_ts"]) if "position_ts" in state else None
+            ),
+            "playing": state.get("playing") == "1",
+            "participants": await presence_tracker.members(room_id),
+            "chat": [json.loads(message) for message in reversed(chat)],
+            "server_ts": server_time_ms(),
+        }
+
+    async def deltas_since(self, room_id: str, since: int) -> Optional[list[dict]]:
+        """
+        Events with a version above `since`, oldest first, or None when the
+        ring no longer reaches back that far (the client needs a snapshot).
+        """
+        state_key, deltas_key, _, _ = room_keys(room_id)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hget(state_key, "v")
+            pipe.lrange(deltas_key, 0, -1)
+            current, raw = await pipe.execute()
+        current = int(current or 0)
+        if since > current:
+            return None
+        if since == current:
+            return []
+
+        missed = []
+        for entry in raw:
+            delta = json.loads(entry)
+            if delta["v"] <= since:
+                break
+            missed.append(delta)
+        if not missed or missed[-1]["v"] != since + 1:
+            return None
+        missed.reverse()
+        return missed
+
+
+room_state = RoomStateStore()
@@ -1,4 +1,6 @@
-from pydantic import EmailStr
+from typing import Any, Optional
+from datetime import datetime
+from pydantic import EmailStr, PrivateAttr
 
 from app.common.models import (
     BaseDocument,
@@ -14,6 +16,26 @@ class User(BaseDocument, BaseTimeStampMixin):
     password: str
     is_active: bool = True
     is_superuser: bool = False
+    last_login: Optional[datetime] = None
+
+    # Role and active flag as last loaded or saved; a save that changes them
+    # must drop the cached principal on every worker.
+    _principal_state: Optional[tuple[bool, bool]] = PrivateAttr(default=None)
+
+    def model_post_init(self, context: Any) -> None:
+        super().model_post_init(context)
+        self._principal_state = (self.is_active, self.is_superuser)
+
+    async def save(self, *args, **kwargs):
+        result = await super().save(*args, **kwargs)
+        state = (self.is_active, self.is_superuser)
+        if state != self._principal_state:
+            # Imported lazily: auth services import this model.
+            from app.api.auth.services import principal_cache
+
+            await principal_cache.invalidate(self.id)
+            self._principal_state = state
+        return result
 
     class Settings:
         name = "USERS"
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 
-from app.api.user.schemas import UserRegister, UserResponse, UserView
-from app.api.user.services import register_user, get_users
+from app.api.user.schemas import UserRegister, UserResponse, UserView, ChangePassword
+from app.api.user.models import User
+from app.api.user.services import register_user, get_users, change_password
+from app.api.auth.dependencies import get_current_user
+from app.api.auth.schemas import Principal
 from app.common.utils import SuccessResponse
+from app.common.fields import parse_fields
+from app.common.cache import cached_response
+from app.common.versioning import collection_etag, etag_matches, not_modified
 
 
 user_router = APIRouter()
@@ -30,6 +37,38 @@ async def register(payload: UserRegister):
     response_model=SuccessResponse[list],
     status_code=status.HTTP_200_OK,
 )
-async def get_all_users():
-    user = await get_users()
+@cached_response(tags=[User], fields_view=UserView)
+async def get_all_users(
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(
+        None, description="Comma-separated subset of fields, e.g. username,email"
+    ),
+):
+    only = parse_fields(fields, UserView)
+    etag = await collection_etag(request, User)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    user = await get_users(fields=only)
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
     return SuccessResponse(data=user)
+
+
+@user_router.post(
+    "/change-password",
+    response_model=SuccessResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def update_password(
+    payload: ChangePassword,
+    current_user: Principal = Depends(get_current_user),
+):
+    await change_password(
+        user_id=current_user.id,
+        old_password=payload.old_password,
+        new_password=payload.new_password,
+    )
+    return SuccessResponse(message="Password changed. Please login again.")
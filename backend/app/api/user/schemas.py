@@ -7,6 +7,38 @@ from typing import Optional, Annotated
 from app.common.utils import ISTTimeStampedResponse
 
 
+def validate_password_strength(value: str) -> str:
+    if len(value) < 8:
+        raise PydanticCustomError(
+            "password_too_short", "Password must be at least 8 characters long."
+        )
+
+    if not re.search(r"[A-Z]", value):
+        raise PydanticCustomError(
+            "password_no_uppercase",
+            "Password must contain at least one uppercase letter.",
+        )
+
+    if not re.search(r"[a-z]", value):
+        raise PydanticCustomError(
+            "password_no_lowercase",
+            "Password must contain at least one lowercase letter.",
+        )
+
+    if not re.search(r"[0-9]", value):
+        raise PydanticCustomError(
+            "password_no_digit", "Password must contain at least one number."
+        )
+
+    if not re.search(r"[@$!%*?&#^+=_.,;:-]", value):
+        raise PydanticCustomError(
+            "password_no_special",
+            "Password must contain at least one special character.",
+        )
+
+    return value
+
+
 class UserRegister(BaseModel):
     username: str = Field(..., min_length=3, max_length=50)
     email: EmailStr | None = None
@@ -26,35 +58,17 @@ class UserRegister(BaseModel):
     @field_validator("password")
     @classmethod
     def validate_password(cls, value: str):
-        if len(value) < 8:
-            raise PydanticCustomError(
-                "password_too_short", "Password must be at least 8 characters long."
-            )
-
-        if not re.search(r"[A-Z]", value):
-            raise PydanticCustomError(
-                "password_no_uppercase",
-                "Password must contain at least one uppercase letter.",
-            )
-
-        if not re.search(r"[a-z]", value):
-            raise PydanticCustomError(
-                "password_no_lowercase",
-                "Password must contain at least one lowercase letter.",
-            )
-
-        if not re.search(r"[0-9]", value):
-            raise PydanticCustomError(
-                "password_no_digit", "Password must contain at least one number."
-            )
-
-        if not re.search(r"[@$!%*?&#^+=_.,;:-]", value):
-            raise PydanticCustomError(
-                "password_no_special",
-                "Password must contain at least one special character.",
-            )
-
-        return value
+        return validate_password_strength(value)
+
+
+class ChangePassword(BaseModel):
+    old_password: str
+    new_password: str = Field(..., min_length=8)
+
+    @field_validator("new_password")
+    @classmethod
+    def validate_new_password(cls, value: str):
+        return validate_password_strength(value)
 
 
 class UserResponse(ISTTimeStampedResponse):
@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import status
 from fastapi.exceptions import HTTPException
 from beanie.odm.operators.find.logical import Or
@@ -7,6 +8,8 @@ from app.common.security import make_password, verify_password
 from app.api.user.models import User
 from app.api.user.schemas import UserRegister, UserResponse, UserView
 from app.common.services import BaseRepository
+from app.common.singleflight import singleflight
+from app.api.auth.services import bump_token_version, principal_cache
 
 logger = get_logger("app.api.user.services")
 
@@ -39,8 +42,33 @@ async def register_user(data: UserRegister) -> any:
     return user
 
 
-async def get_users() -> dict[any]:
+@singleflight(name="user.get_users")
+async def get_users(fields: Optional[tuple[str, ...]] = None) -> dict[any]:
     user_repo = BaseRepository(User)
-    users = await user_repo.find_all(fields=UserView)
+    users = await user_repo.find_all(fields=UserView, only=fields)
     logger.info("User Fetched Successfully")
     return users
+
+
+async def change_password(user_id: str, old_password: str, new_password: str) -> int:
+    """
+    Change a user's password and revoke every token issued before the change.
+    """
+    user_repo = BaseRepository(User)
+    user = await user_repo.find_one(User.id == user_id)
+    if not user or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
+        )
+
+    if not verify_password(password=old_password, hashed=user.password):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Entered password is incorrect.",
+        )
+
+    await user_repo.update(user, {"password": make_password(new_password)})
+    version = await bump_token_version(user_id)
+    await principal_cache.invalidate(user_id)
+    logger.info("Password changed", extra={"extra": {"user_id": user_id}})
+    return version
@@ -1,8 +1,23 @@
-from fastapi import APIRouter
+import os
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends
 from app.core.config import env
 from app.core.logging import get_logger
+from app.core.redis import pool_stats
+from app.core.admission import admission_stats
+from app.core.task_queue import task_queue
+from app.api.room.affinity import room_affinity
+from app.api.room.realtime import room_manager, playback_coalescer
+from app.common.singleflight import singleflight_stats
+from app.common.cache import response_cache_stats
+from app.api.auth.dependencies import require_admin
 
 common_api_router = APIRouter()
+# Worker internals (pids, memory, node URLs): admins only.
+stats_router = APIRouter(
+    prefix="/stats", tags=["Health"], dependencies=[Depends(require_admin)]
+)
 
 
 logger = get_logger("app.common.utils")
@@ -12,3 +27,64 @@ logger = get_logger("app.common.utils")
 async def health_check():
     logger.info("Health check requested")
     return {"status": "ok", "environment": env.app_env}
+
+
+@stats_router.get("/singleflight")
+async def singleflight_statistics():
+    return {"status": "ok", "groups": singleflight_stats()}
+
+
+@stats_router.get("/redis")
+async def redis_statistics():
+    return {"status": "ok", "redis": pool_stats()}
+
+
+@stats_router.get("/admission")
+async def admission_statistics():
+    return {"status": "ok", "admission": admission_stats()}
+
+
+@stats_router.get("/cache")
+async def cache_statistics():
+    return {"status": "ok", "routes": response_cache_stats()}
+
+
+@stats_router.get("/tasks")
+async def task_queue_statistics():
+    return {"status": "ok", "tasks": task_queue.stats()}
+
+
+@stats_router.get("/rooms")
+async def room_statistics():
+    return {
+        "status": "ok",
+        "connections": room_manager.stats(),
+        "coalescing": playback_coalescer.stats(),
+        "affinity": room_affinity.stats(),
+    }
+
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size, or None where /proc is unavailable (not Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+@stats_router.get("/process")
+async def process_statistics():
+    """Per-worker memory and socket counts; used to derive memory per connection."""
+    connections = room_manager.stats()
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "rss_bytes": _rss_bytes(),
+        "asyncio_tasks": len(asyncio.all_tasks()),
+        "room_sockets": connections["local_sockets"],
+        "rooms": connections["local_rooms"],
+    }
+
+
+common_api_router.include_router(stats_router)
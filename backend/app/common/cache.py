@@ -0,0 +1,229 @@
+import json
+import time
+import hashlib
+import functools
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Sequence
+from pydantic import BaseModel, TypeAdapter
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import env
+from app.core.redis import redis_client
+from app.core.logging import get_logger
+from app.common.fields import parse_fields
+from app.common.versioning import collection_versions, etag_matches, not_modified
+
+logger = get_logger("app.common.cache")
+
+CACHE_KEY = "resp_cache:%s:%s"
+# Headers set by the endpoint that must be replayed on a cache hit.
+CACHED_HEADERS = ("etag", "cache-control")
+
+_routes: dict[str, "RouteCacheStats"] = {}
+
+
+class RouteCacheStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        _routes[name] = self
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": (
+                round((self.local_hits + self.redis_hits) / lookups, 4)
+                if lookups
+                else 0.0
+            ),
+        }
+
+
+class LocalResponseCache:
+    """Small in-process LRU of serialized responses with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value: dict, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+local_cache = LocalResponseCache(env.response_cache_local_max_entries)
+
+
+def _find_request(args: tuple, kwargs: dict) -> Optional[Request]:
+    for value in (*args, *kwargs.values()):
+        if isinstance(value, Request):
+            return value
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _response_adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def _serialize(request: Request, result: Any) -> str:
+    """
+    Serialize an endpoint result the way FastAPI would for this route: validate
+    it against the route's response_model and dump with its include/exclude
+    settings, so cached bodies never carry fields the model filters out.
+    """
+    route = request.scope.get("route")
+    response_model = getattr(route, "response_model", None)
+    if response_model is None:
+        return json.dumps(jsonable_encoder(result), separators=(",", ":"))
+    adapter = _response_adapter(response_model)
+    value = adapter.validate_python(result, from_attributes=True)
+    return adapter.dump_json(
+        value,
+        include=route.response_model_include,
+        exclude=route.response_model_exclude,
+        by_alias=route.response_model_by_alias,
+        exclude_unset=route.response_model_exclude_unset,
+        exclude_defaults=route.response_model_exclude_defaults,
+        exclude_none=route.response_model_exclude_none,
+    ).decode()
+
+
+def _replay(entry: dict, request: Request) -> Response:
+    headers = entry["headers"]
+    if etag_matches(request, headers.get("etag")):
+        return not_modified(headers["etag"])
+    return Response(
+        content=entry["body"], media_type="application/json", headers=headers
+    )
+
+
+def cached_response(
+    tags: Sequence[type],
+    vary_query: Sequence[str] = (),
+    fields_view: Optional[type[BaseModel]] = None,
+    vary_auth: bool = False,
+    ttl: Optional[int] = None,
+    name: Optional[str] = None,
+):
+    """
+    Cache a route's serialized JSON response in process and in Redis.
+
+    Entries are keyed by the current version of every model in `tags`, so a
+    BaseDocument.save (which bumps that version) invalidates them everywhere
+    at once. `vary_query` names the query parameters that change the response;
+    `fields_view` keys a `fields=` projection by its canonical form from
+    parse_fields (so fields=a,b and fields=b,a share an entry);
+    `vary_auth` adds the caller's user id. The endpoint must take a `Request`;
+    the versions read for the key are left on `request.state` so
+    collection_etag reuses them instead of reading Redis again.
+
+    Example:
+        @user_router.get("/allUsers")
+        @cached_response(tags=[User], fields_view=UserView)
+        async def get_all_users(request: Request, ...): ...
+    """
+    ttl = ttl or env.response_cache_ttl_seconds
+    tag_names = [model.__name__ for model in tags]
+
+    def decorator(fn: Callable[..., Awaitable[Any]]):
+        route = name or f"{fn.__module__}.{fn.__qualname__}"
+        stats = RouteCacheStats(route)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            request = _find_request(args, kwargs)
+            if not env.response_cache_enabled or request is None:
+                return await fn(*args, **kwargs)
+
+            user_id = None
+            if vary_auth:
+                token = getattr(request.state, "token", None) or {}
+                user_id = token.get("sub")
+            versions = await collection_versions(*tag_names)
+            if versions is None or (vary_auth and not user_id):
+                stats.bypassed += 1
+                return await fn(*args, **kwargs)
+            request.state.collection_versions = dict(zip(tag_names, versions))
+
+            fields = None
+            if fields_view is not None:
+                fields = parse_fields(request.query_params.get("fields"), fields_view)
+            raw = json.dumps(
+                [
+                    versions,
+                    [request.query_params.getlist(param) for param in vary_query],
+                    fields,
+                    user_id,
+                ]
+            )
+            key = CACHE_KEY % (route, hashlib.sha1(raw.encode()).hexdigest())
+
+            entry = local_cache.get(key)
+            if entry is not None:
+                stats.local_hits += 1
+                return _replay(entry, request)
+            try:
+                stored = await redis_client.get(key)
+            except Exception as e:
+                logger.warning(f"Response cache read failed for {route}: {e}")
+                stored = None
+            if stored is not None:
+                stats.redis_hits += 1
+                entry = json.loads(stored)
+                local_cache.set(key, entry, ttl)
+                return _replay(entry, request)
+
+            stats.misses += 1
+            result = await fn(*args, **kwargs)
+            if isinstance(result, Response):
+                return result
+
+            body = _serialize(request, result)
+            endpoint_response = next(
+                (v for v in kwargs.values() if isinstance(v, Response)), None
+            )
+            headers = {}
+            if endpoint_response is not None:
+                headers = {
+                    header: endpoint_response.headers[header]
+                    for header in CACHED_HEADERS
+                    if header in endpoint_response.headers
+                }
+            entry = {"headers": headers, "body": body}
+            local_cache.set(key, entry, ttl)
+            try:
+                await redis_client.set(key, json.dumps(entry), ex=ttl)
+            except Exception as e:
+                logger.warning(f"Response cache write failed for {route}: {e}")
+            return Response(
+                content=body, media_type="application/json", headers=headers
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def response_cache_stats() -> dict[str, dict[str, Any]]:
+    return {name: route.stats() for name, route in _routes.items()}
@@ -78,6 +78,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content=error_response(exc.detail),
+        headers=getattr(exc, "headers", None),
     )
 
 
@@ -0,0 +1,46 @@
+from functools import lru_cache
+from typing import Optional
+from fastapi import HTTPException, status
+from pydantic import BaseModel, create_model
+
+ALWAYS_INCLUDED = ("id",)
+
+
+def parse_fields(
+    raw: Optional[str], view: type[BaseModel]
+) -> Optional[tuple[str, ...]]:
+    """
+    Validate a `fields=a,b,c` query parameter against a view model.
+
+    The view's own fields are the allow-list, so anything a view does not
+    expose (e.g. password hashes) can never be requested. Returns a canonical,
+    sorted tuple, or None when every field is wanted.
+    """
+    if not raw:
+        return None
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = sorted(requested - view.model_fields.keys())
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. "
+            f"Allowed: {', '.join(view.model_fields)}.",
+        )
+    requested.update(name for name in ALWAYS_INCLUDED if name in view.model_fields)
+    return tuple(sorted(requested))
+
+
+@lru_cache(maxsize=256)
+def projection_model(view: type[BaseModel], fields: tuple[str, ...]) -> type[BaseModel]:
+    """
+    Subset of `view` holding only `fields`. Built once per field combination;
+    Beanie derives the Mongo projection from its (aliased) fields.
+    """
+    return create_model(
+        f"{view.__name__}[{','.join(fields)}]",
+        __base__=view.__base__,
+        **{
+            name: (view.model_fields[name].annotation, view.model_fields[name])
+            for name in fields
+        },
+    )
@@ -77,5 +77,10 @@ class BaseDocument(Document):
 
         await super().save(*args, **kwargs)
 
+        # Imported lazily: app.core.redis -> config -> models would be circular.
+        from app.common.versioning import bump_collection_version
+
+        await bump_collection_version(type(self).__name__)
+
     class Settings:
         pass
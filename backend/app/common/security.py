@@ -2,15 +2,19 @@
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
 
+from app.core.tracing import span
+
 passwordHasher = PasswordHasher()
 
 
 def make_password(password: str) -> str:
-    return passwordHasher.hash(password)
+    with span("argon2.hash"):
+        return passwordHasher.hash(password)
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    try:
-        return passwordHasher.verify(hashed, password)
-    except VerifyMismatchError:
-        return False
+    with span("argon2.verify"):
+        try:
+            return passwordHasher.verify(hashed, password)
+        except VerifyMismatchError:
+            return False
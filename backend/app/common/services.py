@@ -1,7 +1,9 @@
 # app/db/base_repository.py
 from beanie import Document
 from pydantic import BaseModel
-from typing import Type, TypeVar, Generic, Optional
+from typing import Type, TypeVar, Generic, Optional, Sequence
+
+from app.common.fields import projection_model
 
 T = TypeVar("T", bound=Document)
 
@@ -18,13 +20,22 @@ class BaseRepository(Generic[T]):
         return await self.model.find_one(query)
 
     async def find_all(
-        self, fields: Optional[type[BaseModel]] = None, query=None
+        self,
+        fields: Optional[type[BaseModel]] = None,
+        query=None,
+        only: Optional[Sequence[str]] = None,
     ) -> list[T]:
-        if query:
-            return await self.model.find_many(query).to_list()
+        """
+        `fields` projects through a view model; `only` narrows that view to a
+        subset of its fields (see app.common.fields.parse_fields), so Mongo
+        returns just those fields.
+        """
+        if fields and only:
+            fields = projection_model(fields, tuple(only))
+        cursor = self.model.find_many(query) if query else self.model.find_all()
         if fields:
-            return await self.model.find_all().project(fields).to_list()
-        return await self.model.find_all().to_list()
+            cursor = cursor.project(fields)
+        return await cursor.to_list()
 
     async def update(self, document: T, update_data: dict):
         for key, value in update_data.items():
@@ -0,0 +1,131 @@
+import time
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+MAX_REUSED_RESULTS = 1024
+
+_groups: dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls that share a key into one execution.
+
+    Every waiter receives the leader's result or exception. With ``ttl`` set,
+    a finished result is also reused for that many seconds.
+    """
+
+    def __init__(self, name: str, ttl: float = 0.0):
+        self.name = name
+        self.ttl = ttl
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._results: dict[Hashable, tuple[float, Any]] = {}
+        self.calls = 0
+        self.executions = 0
+        self.shared = 0
+        self.reused = 0
+        self.errors = 0
+        _groups[name] = self
+
+    def forget(self, key: Optional[Hashable] = None) -> None:
+        """Drop a reused result (or all of them) so the next call executes."""
+        if key is None:
+            self._results.clear()
+        else:
+            self._results.pop(key, None)
+
+    def _remember(self, key: Hashable, result: Any) -> None:
+        now = time.monotonic()
+        if len(self._results) >= MAX_REUSED_RESULTS:
+            self._results = {k: v for k, v in self._results.items() if v[0] > now}
+        self._results[key] = (now + self.ttl, result)
+
+    async def do(
+        self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs
+    ) -> Any:
+        self.calls += 1
+        while True:
+            if self.ttl:
+                cached = self._results.get(key)
+                if cached and cached[0] > time.monotonic():
+                    self.reused += 1
+                    return cached[1]
+
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            self.shared += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us: retry with a fresh leader.
+                if not future.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.executions += 1
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.errors += 1
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            if self.ttl:
+                self._remember(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "shared": self.shared,
+            "reused": self.reused,
+            "errors": self.errors,
+            "inflight": len(self._inflight),
+        }
+
+
+def _default_key(*args, **kwargs) -> Hashable:
+    return repr((args, sorted(kwargs.items())))
+
+
+def singleflight(
+    key: Optional[Callable[..., Hashable]] = None,
+    ttl: float = 0.0,
+    name: Optional[str] = None,
+):
+    """
+    Decorator applying a SingleFlight group to an async function.
+
+    Example:
+        @singleflight(key=lambda user_id: user_id, ttl=0.5)
+        async def load_profile(user_id: str): ...
+    """
+
+    def decorator(fn: Callable[..., Awaitable[Any]]):
+        group = SingleFlight(name or f"{fn.__module__}.{fn.__qualname__}", ttl=ttl)
+        key_fn = key or _default_key
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await group.do(key_fn(*args, **kwargs), fn, *args, **kwargs)
+
+        wrapper.singleflight = group
+        return wrapper
+
+    return decorator
+
+
+def singleflight_stats() -> dict[str, dict[str, Any]]:
+    return {name: group.stats() for name, group in _groups.items()}
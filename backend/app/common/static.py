@@ -0,0 +1,149 @@
+import os
+import gzip
+import hashlib
+import mimetypes
+from dataclasses import dataclass, field
+from typing import Optional
+from fastapi import Request, Response, status
+
+from app.core.config import env
+from app.core.logging import get_logger
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+logger = get_logger("app.common.static")
+
+MIN_COMPRESS_SIZE = 256
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+    "image/x-icon",
+    "image/vnd.microsoft.icon",
+)
+
+
+@dataclass
+class StaticAsset:
+    media_type: str
+    digest: str
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+    def etag(self, encoding: str) -> str:
+        suffix = "" if encoding == "identity" else f"-{encoding}"
+        return f'"{self.digest}{suffix}"'
+
+
+def _is_compressible(media_type: str) -> bool:
+    return media_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def build_asset(body: bytes, media_type: str) -> StaticAsset:
+    """Precompute the identity, gzip and (if available) brotli variants of a body."""
+    asset = StaticAsset(
+        media_type=media_type,
+        digest=hashlib.sha256(body).hexdigest()[:32],
+        variants={"identity": body},
+    )
+    if len(body) < MIN_COMPRESS_SIZE or not _is_compressible(media_type):
+        return asset
+
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    if len(compressed) < len(body):
+        asset.variants["gzip"] = compressed
+    if brotli is not None:
+        compressed = brotli.compress(body, quality=11)
+        if len(compressed) < len(body):
+            asset.variants["br"] = compressed
+    return asset
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if params in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name:
+            accepted.add(name.lower())
+    return accepted
+
+
+class StaticAssetCache:
+    """
+    Serves static files and pre-rendered pages from memory.
+
+    Every asset is compressed once at startup and served by Accept-Encoding
+    with a strong, per-variant ETag and long-lived cache headers.
+    """
+
+    def __init__(self, max_age: int = env.static_max_age_seconds):
+        self.max_age = max_age
+        self._assets: dict[str, StaticAsset] = {}
+
+    def load_directory(self, directory: str, prefix: str = "") -> int:
+        loaded = 0
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, directory).replace(os.sep, "/")
+                media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                with open(path, "rb") as f:
+                    self.add(f"{prefix}{relative}", f.read(), media_type)
+                loaded += 1
+        logger.info(
+            f"Loaded {loaded} static assets (brotli={'on' if brotli else 'off'})"
+        )
+        return loaded
+
+    def add(self, key: str, body: bytes, media_type: str) -> StaticAsset:
+        asset = build_asset(body, media_type)
+        self._assets[key] = asset
+        return asset
+
+    def get(self, key: str) -> Optional[StaticAsset]:
+        return self._assets.get(key)
+
+    def response(
+        self, key: str, request: Request, cache_control: Optional[str] = None
+    ) -> Response:
+        asset = self._assets.get(key)
+        if asset is None:
+            return Response(status_code=status.HTTP_404_NOT_FOUND)
+
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        encoding = next(
+            (
+                enc
+                for enc in ("br", "gzip")
+                if enc in asset.variants and enc in accepted
+            ),
+            "identity",
+        )
+        etag = asset.etag(encoding)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": cache_control or f"public, max-age={self.max_age}",
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(
+            content=asset.variants[encoding],
+            media_type=asset.media_type,
+            headers=headers,
+        )
+
+
+static_assets = StaticAssetCache()
@@ -0,0 +1,86 @@
+import time
+import hashlib
+from typing import Optional
+from fastapi import Request, Response, status
+
+from app.core.redis import redis_client
+from app.core.logging import get_logger
+
+logger = get_logger("app.common.versioning")
+
+# Hash tag keeps every counter in one cluster slot so MGET works in cluster mode.
+VERSION_KEY = "{collection_version}:%s"
+
+
+def _seed() -> int:
+    # Counters start from the wall clock so a flushed Redis never hands out a
+    # version (and therefore an ETag) that was already given to clients.
+    return int(time.time() * 1000)
+
+
+async def bump_collection_version(model_name: str) -> Optional[int]:
+    """Advance the version of a model's collection after a write."""
+    key = VERSION_KEY % model_name
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.set(key, _seed(), nx=True)
+            pipe.incr(key)
+            return (await pipe.execute())[-1]
+    except Exception as e:
+        logger.warning(f"Failed to bump collection version for {model_name}: {e}")
+        return None
+
+
+async def collection_versions(*model_names: str) -> Optional[list[int]]:
+    """Current versions of the given collections, or None when Redis is unavailable."""
+    keys = [VERSION_KEY % name for name in model_names]
+    try:
+        versions = await redis_client.mget(keys)
+        if None in versions:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for key, version in zip(keys, versions):
+                    if version is None:
+                        pipe.set(key, _seed(), nx=True)
+                await pipe.execute()
+            versions = await redis_client.mget(keys)
+    except Exception as e:
+        logger.warning(f"Failed to read collection versions: {e}")
+        return None
+    return [int(version) for version in versions]
+
+
+async def collection_etag(request: Request, *models: type) -> Optional[str]:
+    """
+    Strong ETag for a response that depends only on the given models and the
+    request URL. Read before querying, so a concurrent write can only make the
+    tag older than the body, never newer. Reuses the versions cached_response
+    already read for this request when it has them.
+    """
+    names = [model.__name__ for model in models]
+    known = getattr(request.state, "collection_versions", None) or {}
+    if all(name in known for name in names):
+        versions = [known[name] for name in names]
+    else:
+        versions = await collection_versions(*names)
+    if versions is None:
+        return None
+    raw = f"{request.url.path}?{request.url.query}|" + ",".join(
+        f"{name}:{version}" for name, version in zip(names, versions)
+    )
+    return f'"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    if etag is None:
+        return False
+    if_none_match = request.headers.get("if-none-match", "")
+    return if_none_match.strip() == "*" or etag in (
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
@@ -0,0 +1,149 @@
+import asyncio
+from typing import Any, Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+from fastapi.responses import JSONResponse
+
+from app.core.config import env
+from app.core.logging import get_logger
+from app.common.constants import Constants
+from app.common.exception import error_response
+
+logger = get_logger("app.core.admission")
+
+# Argon2/JWT-heavy endpoints get their own, much smaller, concurrency budget.
+CRYPTO_PATHS = {
+    f"{Constants.API_V1_URL}/auth/login",
+    f"{Constants.API_V1_URL}/user/register",
+    f"{Constants.API_V1_URL}/user/change-password",
+}
+EXEMPT_PATHS = {f"{Constants.API_V1_URL}/health"}
+EXEMPT_PREFIXES = ("/static/", "/favicon.ico", f"{Constants.API_V1_URL}/stats/")
+
+
+class AdmissionGate:
+    """Concurrency limit with a bounded wait queue and a wait budget."""
+
+    def __init__(self, name: str, limit: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    async def acquire(self) -> bool:
+        if not self._semaphore.locked():
+            # Free slot: Semaphore.acquire() returns without suspending.
+            await self._semaphore.acquire()
+        else:
+            if self.waiting >= self.max_queue:
+                self.shed_queue_full += 1
+                return False
+            if not await self._wait():
+                return False
+        self.active += 1
+        self.admitted += 1
+        return True
+
+    async def _wait(self) -> bool:
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self.shed_timeout += 1
+            return False
+        finally:
+            self.waiting -= 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+        }
+
+
+admission_gates: dict[str, AdmissionGate] = {
+    "crypto": AdmissionGate(
+        "crypto",
+        limit=env.admission_crypto_concurrency,
+        max_queue=env.admission_crypto_queue,
+        max_wait=env.admission_crypto_wait_seconds,
+    ),
+    "default": AdmissionGate(
+        "default",
+        limit=env.admission_default_concurrency,
+        max_queue=env.admission_default_queue,
+        max_wait=env.admission_default_wait_seconds,
+    ),
+}
+
+
+def classify(path: str) -> Optional[str]:
+    """Route class for a request path, or None when the path is never shed."""
+    if path in EXEMPT_PATHS or path.startswith(EXEMPT_PREFIXES):
+        return None
+    if path in CRYPTO_PATHS:
+        return "crypto"
+    return "default"
+
+
+def admission_stats() -> dict[str, dict[str, Any]]:
+    return {name: gate.stats() for name, gate in admission_gates.items()}
+
+
+class AdmissionControlMiddleware:
+    """
+    Admits HTTP requests per route class and sheds the rest with a fast 503
+    and Retry-After, so a saturated class cannot drag down cheap endpoints.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify(scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        if route_class == "default" and scope.get("admitted"):
+            # Batch sub-request: the enclosing request already holds a slot.
+            await self.app(scope, receive, send)
+            return
+
+        gate = admission_gates[route_class]
+        if not await gate.acquire():
+            logger.warning(
+                "Request shed",
+                extra={"extra": {"path": scope["path"], "route_class": route_class}},
+            )
+            response = JSONResponse(
+                status_code=503,
+                content=error_response("Server is busy, please retry shortly."),
+                headers={"Retry-After": str(env.admission_retry_after_seconds)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
@@ -3,6 +3,7 @@ from app.core.config import (
     env,
 )
 from app.common.constants import Constants
+from app.core.tracing import setup_celery_tracing
 
 
 celery_app = Celery(
@@ -20,3 +21,5 @@ celery_app.conf.update(
     timezone=Constants.TIME_ZONE,
     enable_utc=True,
 )
+
+setup_celery_tracing()
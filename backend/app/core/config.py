@@ -1,14 +1,24 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 from app.common.constants import PathConstants
 from app.api.user.models import User
+from app.api.auth.models import AuthEvent
+from app.api.room.models import ChatBucket
 
 
 class Env(BaseSettings):
     app_env: str
     mongo_uri: str
     redis_url: str = "redis://localhost:6379/0"
+    redis_mode: str = "standalone"
+    redis_max_connections: int = 50
+    redis_pool_timeout_seconds: float = 5.0
+    redis_sentinel_hosts: str = ""
+    redis_sentinel_master: str = "mymaster"
+    redis_replica_url: Optional[str] = None
+    redis_replica_reads: bool = False
 
     enable_elk_logging: bool = False
     logstash_host: str = "localhost"
@@ -20,6 +30,85 @@ class Env(BaseSettings):
     jwt_kid: str = "default"
     access_token_expire_seconds: int = 900
     refresh_token_expire_seconds: int = 1209600
+    token_version_cache_seconds: float = 5.0
+    login_max_failures_account: int = 5
+    login_max_failures_ip: int = 20
+    login_failure_window_seconds: int = 900
+    login_lockout_base_seconds: int = 30
+    login_lockout_max_seconds: int = 3600
+    principal_cache_ttl_seconds: float = 30.0
+    principal_stale_ttl_seconds: float = 300.0
+    principal_cache_max_entries: int = 10000
+
+    web_concurrency: Optional[int] = None
+    server_keep_alive_seconds: int = 5
+    server_backlog: int = 2048
+    server_max_requests: Optional[int] = None
+    server_max_requests_jitter: Optional[int] = None
+    server_graceful_timeout_seconds: int = 30
+
+    static_max_age_seconds: int = 604800
+    gzip_enabled: bool = True
+    gzip_minimum_size: int = 1024
+
+    auth_events_enabled: bool = True
+    auth_events_stream_maxlen: int = 100000
+    auth_events_batch_size: int = 500
+
+    admission_enabled: bool = True
+    admission_crypto_concurrency: int = 4
+    admission_crypto_queue: int = 64
+    admission_crypto_wait_seconds: float = 2.0
+    admission_default_concurrency: int = 256
+    admission_default_queue: int = 1024
+    admission_default_wait_seconds: float = 5.0
+    admission_retry_after_seconds: int = 1
+
+    batch_max_requests: int = 20
+    batch_concurrency: int = 8
+
+    response_cache_enabled: bool = True
+    response_cache_ttl_seconds: int = 60
+    response_cache_local_max_entries: int = 1024
+
+    task_queue_capacity: int = 10000
+    task_queue_workers: int = 4
+    task_queue_overflow: str = "drop_oldest"
+    task_queue_drain_timeout_seconds: float = 10.0
+
+    tracing_enabled: bool = False
+    tracing_sample_rate: float = 0.1
+    tracing_exporter: str = "otlp"
+    tracing_otlp_endpoint: str = "http://localhost:4317"
+    tracing_file_path: str = "./traces.jsonl"
+
+    mongo_slow_query_enabled: bool = True
+    mongo_slow_query_ms: int = 100
+    mongo_slow_query_log_interval_seconds: int = 300
+    mongo_slow_query_explain: bool = True
+
+    presence_ttl_seconds: int = 30
+    presence_flush_interval_seconds: float = 1.0
+    presence_evict_interval_seconds: float = 10.0
+    presence_key_ttl_seconds: int = 300
+    playback_lead_ms: int = 250
+    room_delta_ring_size: int = 256
+    room_chat_tail_size: int = 50
+    room_state_ttl_seconds: int = 86400
+    room_coalesce_window_ms: int = 50
+    room_affinity_enabled: bool = False
+    room_affinity_url: Optional[str] = None
+    room_affinity_vnodes: int = 64
+    room_affinity_heartbeat_seconds: float = 5.0
+    room_affinity_node_ttl_seconds: float = 15.0
+    chat_bucket_size: int = 100
+    chat_bucket_window_seconds: int = 3600
+    chat_history_page_size: int = 50
+
+    media_cache_ttl_seconds: int = 86400
+    media_negative_cache_ttl_seconds: int = 300
+    media_fetch_timeout_seconds: float = 5.0
+    media_stub_resolver_enabled: bool = False
 
     class Config:
         env_file = ".env"
@@ -28,7 +117,7 @@ class Env(BaseSettings):
 
 class GlobalSettings:
     STATIC_DIR: str = os.path.join(PathConstants.APP_DIR, "static")
-    BEANIE_MODELS: list = [User]
+    BEANIE_MODELS: list = [User, AuthEvent, ChatBucket]
 
     def __str__(self):
         return f"Sets global settings for application."
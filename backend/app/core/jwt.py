@@ -8,6 +8,7 @@ from fastapi import HTTPException, status
 
 from app.core.config import env
 from app.core.logging import get_logger
+from app.core.tracing import span
 
 logger = get_logger("app.core.jwt")
 
@@ -123,7 +124,8 @@ def create_access_token(
         payload.update(extra_claims)
 
     headers = {"alg": _ALG, "kid": _KID, "typ": "JWT"}
-    token = jwt.encode(payload, _PRIVATE_KEY, algorithm=_ALG, headers=headers)
+    with span("jwt.sign", token_type="access"):
+        token = jwt.encode(payload, _PRIVATE_KEY, algorithm=_ALG, headers=headers)
     return token
 
 
@@ -166,7 +168,8 @@ def create_refresh_token(
         payload.update(extra_claims)
 
     headers = {"alg": _ALG, "kid": _KID, "typ": "JWT"}
-    token = jwt.encode(payload, _PRIVATE_KEY, algorithm=_ALG, headers=headers)
+    with span("jwt.sign", token_type="refresh"):
+        token = jwt.encode(payload, _PRIVATE_KEY, algorithm=_ALG, headers=headers)
     return token
 
 
@@ -184,7 +187,8 @@ def verify_token(token: str, expected_type: Optional[str] = None) -> Dict[str, A
 
     try:
         options = {"require": ["exp", "iat", "nbf", "jti", "sub"]}
-        payload = jwt.decode(token, _PUBLIC_KEY, algorithms=[_ALG], options=options)
+        with span("jwt.verify"):
+            payload = jwt.decode(token, _PUBLIC_KEY, algorithms=[_ALG], options=options)
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired"
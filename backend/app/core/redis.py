@@ -1,24 +1,188 @@
+import time
+import asyncio
 import redis.asyncio as aioredis
+from typing import Any
+from redis.asyncio.cluster import RedisCluster
+from redis.asyncio.connection import BlockingConnectionPool
+from redis.asyncio.sentinel import Sentinel, SentinelConnectionPool
+
 from app.core.config import env
 from app.core.logging import get_logger
 
 logger = get_logger("app.core.redis")
 
+REDIS_MODES = ("standalone", "sentinel", "cluster")
+
+
+class PoolWaitMixin:
+    """Records how long callers wait to check a connection out of the pool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def get_connection(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().get_connection(*args, **kwargs)
+        except aioredis.ConnectionError as e:
+            if isinstance(e.__cause__, asyncio.TimeoutError):
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_connections": self.max_connections,
+            "in_use": len(self._in_use_connections),
+            "idle": len(self._available_connections),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": (
+                round(1000 * self.wait_total / self.checkouts, 3)
+                if self.checkouts
+                else 0.0
+            ),
+            "wait_max_ms": round(1000 * self.wait_max, 3),
+        }
+
+
+class InstrumentedBlockingConnectionPool(PoolWaitMixin, BlockingConnectionPool):
+    pass
+
+
+class InstrumentedSentinelConnectionPool(
+    PoolWaitMixin, SentinelConnectionPool, BlockingConnectionPool
+):
+    """Sentinel-managed pool that blocks (up to the timeout) when exhausted."""
+
+    pass
+
+
+_CLIENT_OPTIONS = {"encoding": "utf-8", "decode_responses": True}
+
+
+def _pool_options() -> dict[str, Any]:
+    return {
+        "max_connections": env.redis_max_connections,
+        "timeout": env.redis_pool_timeout_seconds,
+        **_CLIENT_OPTIONS,
+    }
+
+
+def _sentinel_hosts() -> list[tuple[str, int]]:
+    hosts = []
+    for entry in env.redis_sentinel_hosts.split(","):
+        if entry.strip():
+            host, _, port = entry.strip().partition(":")
+            hosts.append((host, int(port or 26379)))
+    return hosts
+
+
+def _build_clients() -> tuple[Any, Any, Any]:
+    """
+    Build the primary client, the client used for read-mostly calls and the
+    client used for pub/sub. The read client is the primary itself unless
+    replica reads are enabled; the pub/sub client is the primary except in
+    cluster mode (see below).
+    """
+    mode = env.redis_mode
+    if mode not in REDIS_MODES:
+        raise ValueError(
+            f"Unsupported REDIS_MODE '{mode}', expected one of {REDIS_MODES}"
+        )
+
+    if mode == "cluster":
+        primary = RedisCluster.from_url(
+            env.redis_url, max_connections=env.redis_max_connections, **_CLIENT_OPTIONS
+        )
+        # RedisCluster has no pubsub(). Cluster nodes forward PUBLISH to each
+        # other, so a plain client on the seed node can subscribe and publish.
+        pubsub = aioredis.Redis.from_pool(
+            InstrumentedBlockingConnectionPool.from_url(
+                env.redis_url, **_pool_options()
+            )
+        )
+        if not env.redis_replica_reads:
+            return primary, primary, pubsub
+        replica = RedisCluster.from_url(
+            env.redis_url,
+            max_connections=env.redis_max_connections,
+            read_from_replicas=True,
+            **_CLIENT_OPTIONS,
+        )
+        return primary, replica, pubsub
+
+    if mode == "sentinel":
+        sentinel = Sentinel(
+            _sentinel_hosts(), socket_timeout=env.redis_pool_timeout_seconds
+        )
+        primary = sentinel.master_for(
+            env.redis_sentinel_master,
+            connection_pool_class=InstrumentedSentinelConnectionPool,
+            **_pool_options(),
+        )
+        if not env.redis_replica_reads:
+            return primary, primary, primary
+        replica = sentinel.slave_for(
+            env.redis_sentinel_master,
+            connection_pool_class=InstrumentedSentinelConnectionPool,
+            **_pool_options(),
+        )
+        return primary, replica, primary
+
+    primary = aioredis.Redis.from_pool(
+        InstrumentedBlockingConnectionPool.from_url(env.redis_url, **_pool_options())
+    )
+    if not (env.redis_replica_reads and env.redis_replica_url):
+        return primary, primary, primary
+    replica = aioredis.Redis.from_pool(
+        InstrumentedBlockingConnectionPool.from_url(
+            env.redis_replica_url, **_pool_options()
+        )
+    )
+    return primary, replica, primary
+
+
 redis_client: aioredis.Redis | None = None
+redis_read_client: aioredis.Redis | None = None
+redis_pubsub_client: aioredis.Redis | None = None
+
+redis_client, redis_read_client, redis_pubsub_client = _build_clients()
+
 
-redis_client = aioredis.from_url(
-    env.redis_url,
-    encoding="utf-8",
-    decode_responses=True,
-    max_connections=20,
-)
+def pool_stats() -> dict[str, Any]:
+    """Connection pool usage and checkout wait times for the primary and read clients."""
+    stats: dict[str, Any] = {"mode": env.redis_mode}
+    for name, client in (
+        ("primary", redis_client),
+        ("read", redis_read_client),
+        ("pubsub", redis_pubsub_client),
+    ):
+        if name != "primary" and client is redis_client:
+            stats[name] = "primary"
+            continue
+        pool = getattr(client, "connection_pool", None)
+        stats[name] = pool.stats() if isinstance(pool, PoolWaitMixin) else None
+    return stats
 
 
 async def connect_to_redis() -> bool:
     """Initialize a connection pool to Redis and return a shared Redis instance."""
     try:
         await redis_client.ping()
-        logger.info("Connected to redis Successfully.")
+        if redis_read_client is not redis_client:
+            await redis_read_client.ping()
+        if redis_pubsub_client is not redis_client:
+            await redis_pubsub_client.ping()
+        logger.info(f"Connected to redis Successfully ({env.redis_mode}).")
     except Exception as e:
         logger.error(f"Redis connection failed: {e}")
         raise
@@ -26,8 +190,14 @@ async def connect_to_redis() -> bool:
 
 async def close_redis_connection():
     """Gracefully close the Redis connection pool."""
-    global redis_client
+    global redis_client, redis_read_client, redis_pubsub_client
+    if redis_read_client and redis_read_client is not redis_client:
+        await redis_read_client.close()
+    if redis_pubsub_client and redis_pubsub_client is not redis_client:
+        await redis_pubsub_client.close()
     if redis_client:
         await redis_client.close()
         logger.info("Redis connection closed.")
-        redis_client = None
+    redis_client = None
+    redis_read_client = None
+    redis_pubsub_client = None
@@ -0,0 +1,143 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+from app.core.config import env
+from app.core.logging import get_logger
+
+logger = get_logger("app.core.task_queue")
+
+OVERFLOW_POLICIES = ("reject", "drop_oldest")
+
+Job = tuple[Callable[..., Awaitable[Any]], tuple, dict]
+
+
+class BackgroundTaskQueue:
+    """
+    Bounded in-process queue of small async side effects (audit events,
+    last-login updates, cache warming) run by a fixed pool of worker
+    coroutines, so they leave the request path without a Celery round trip.
+
+    `submit` never blocks: when the queue is full the overflow policy either
+    rejects the new job or evicts the oldest one. `enqueue` applies
+    backpressure instead, waiting up to `timeout` for room first.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int = env.task_queue_capacity,
+        workers: int = env.task_queue_workers,
+        overflow: str = env.task_queue_overflow,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}")
+        self.name = name
+        self.capacity = capacity
+        self.workers = workers
+        self.overflow = overflow
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=capacity)
+        self._workers: list[asyncio.Task] = []
+        self._accepting = False
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._accepting
+
+    def submit(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> bool:
+        """Queue `fn(*args, **kwargs)`; returns False when the job was not accepted."""
+        if not self._accepting:
+            self.dropped += 1
+            logger.warning(
+                f"Task queue {self.name} is not running; dropped {fn.__name__}"
+            )
+            return False
+        if self._queue.full():
+            if self.overflow == "reject":
+                self.dropped += 1
+                return False
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self.dropped += 1
+        self._queue.put_nowait((fn, args, kwargs))
+        self.submitted += 1
+        return True
+
+    async def enqueue(
+        self,
+        fn: Callable[..., Awaitable[Any]],
+        *args,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> bool:
+        """
+        Like `submit`, but wait up to `timeout` seconds for space first; the
+        overflow policy applies only once the wait times out.
+        """
+        if not self._accepting:
+            return self.submit(fn, *args, **kwargs)
+        try:
+            await asyncio.wait_for(self._queue.put((fn, args, kwargs)), timeout=timeout)
+        except asyncio.TimeoutError:
+            return self.submit(fn, *args, **kwargs)
+        self.submitted += 1
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            fn, args, kwargs = await self._queue.get()
+            try:
+                await fn(*args, **kwargs)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Background task {fn.__name__} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        self._accepting = True
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+        logger.info(f"Task queue {self.name} started with {self.workers} workers.")
+
+    async def stop(self, timeout: float = env.task_queue_drain_timeout_seconds) -> None:
+        """Stop accepting jobs, drain what is queued (up to `timeout`), then stop workers."""
+        if not self._workers:
+            return
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Task queue {self.name} drain timed out; "
+                f"{self._queue.qsize()} jobs discarded."
+            )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info(f"Task queue {self.name} stopped.")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "workers": self.workers,
+            "overflow": self.overflow,
+            "depth": self._queue.qsize(),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+task_queue = BackgroundTaskQueue("default")
@@ -0,0 +1,264 @@
+from contextlib import nullcontext
+from typing import Any, Optional, Sequence
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import env
+from app.core.logging import get_logger
+from app.common.constants import Constants
+
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        SpanExporter,
+        SpanExportResult,
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  # tracing is optional; every helper below degrades to a no-op
+    trace = None
+
+logger = get_logger("app.core.tracing")
+
+_tracer = None
+_provider = None
+
+
+if trace is not None:
+
+    class FileSpanExporter(SpanExporter):
+        """Writes finished spans as JSON lines to a local file."""
+
+        def __init__(self, path: str):
+            self._file = open(path, "a", encoding="utf-8")
+
+        def export(self, spans: Sequence[Any]) -> "SpanExportResult":
+            for span in spans:
+                self._file.write(span.to_json(indent=None) + "\n")
+            self._file.flush()
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self) -> None:
+            self._file.close()
+
+
+def _build_exporter():
+    if env.tracing_exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
+                OTLPSpanExporter,
+            )
+        except ImportError:
+            logger.warning(
+                "OTLP exporter not installed; writing spans to "
+                f"{env.tracing_file_path} instead."
+            )
+        else:
+            return OTLPSpanExporter(endpoint=env.tracing_otlp_endpoint)
+    return FileSpanExporter(env.tracing_file_path)
+
+
+def setup_tracing() -> bool:
+    """Install the tracer provider. Returns False when tracing is off or unavailable."""
+    global _tracer, _provider
+    if not env.tracing_enabled:
+        return False
+    if trace is None:
+        logger.warning("TRACING_ENABLED is set but opentelemetry-sdk is not installed.")
+        return False
+    if _tracer is not None:
+        return True
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": Constants.APP_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(env.tracing_sample_rate)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(_build_exporter()))
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer("app")
+    logger.info(f"Tracing enabled (sample rate {env.tracing_sample_rate}).")
+    return True
+
+
+def shutdown_tracing() -> None:
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def span(name: str, **attributes):
+    """Context manager for a child span of the current context; no-op when tracing is off."""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+class TracingMiddleware:
+    """One server span per HTTP request, continuing any incoming trace context."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if _tracer is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {
+            k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]
+        }
+        with _tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}",
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]},
+        ) as request_span:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        request_span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+
+def instrument_redis(*clients: Any) -> None:
+    """
+    Trace Redis commands. Uses opentelemetry-instrumentation-redis when it is
+    installed; otherwise wraps each client's execute_command (one span per
+    command) and pipeline() (one span per executed pipeline or transaction,
+    listing its commands).
+    """
+    if _tracer is None:
+        return
+    try:
+        from opentelemetry.instrumentation.redis import RedisInstrumentor
+    except ImportError:
+        pass
+    else:
+        RedisInstrumentor().instrument()
+        return
+
+    for client in {id(c): c for c in clients if c is not None}.values():
+        execute_command = client.execute_command
+        pipeline = client.pipeline
+
+        async def traced(*args, _execute=execute_command, **options):
+            with _tracer.start_as_current_span(
+                f"redis {args[0]}",
+                kind=SpanKind.CLIENT,
+                attributes={"db.system": "redis", "db.operation": str(args[0])},
+            ):
+                return await _execute(*args, **options)
+
+        def traced_pipeline(*args, _pipeline=pipeline, **kwargs):
+            pipe = _pipeline(*args, **kwargs)
+            execute = pipe.execute
+
+            async def traced_execute(*exec_args, **exec_kwargs):
+                stack = getattr(pipe, "command_stack", None) or getattr(
+                    pipe, "_command_stack", ()
+                )
+                names = [str(_command_name(entry)) for entry in stack]
+                transaction = getattr(pipe, "is_transaction", False)
+                operation = "MULTI" if transaction else "PIPELINE"
+                with _tracer.start_as_current_span(
+                    f"redis {operation}",
+                    kind=SpanKind.CLIENT,
+                    attributes={
+                        "db.system": "redis",
+                        "db.operation": operation,
+                        "db.redis.pipeline_length": len(names),
+                        "db.statement": " ".join(names),
+                    },
+                ):
+                    return await execute(*exec_args, **exec_kwargs)
+
+            pipe.execute = traced_execute
+            return pipe
+
+        client.execute_command = traced
+        client.pipeline = traced_pipeline
+
+
+def _command_name(entry: Any) -> Any:
+    # Pipelines keep (args, options) tuples; cluster pipelines keep objects
+    # with an `args` attribute.
+    args = entry[0] if isinstance(entry, tuple) else getattr(entry, "args", ())
+    return args[0] if args else "?"
+
+
+class MongoTracingListener(monitoring.CommandListener):
+    """
+    Span per Mongo command from driver command monitoring. Motor runs driver
+    calls on executor threads, so spans are parented to the request only
+    when the driver reports the event within the request's context.
+    """
+
+    def __init__(self):
+        self._spans: dict[tuple[int, Any], Any] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        command_span = _tracer.start_span(
+            f"mongo {event.command_name}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": "mongodb",
+                "db.name": event.database_name,
+                "db.operation": event.command_name,
+                "db.mongodb.collection": str(event.command.get(event.command_name, "")),
+            },
+        )
+        self._spans[(event.request_id, event.connection_id)] = command_span
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        command_span = self._spans.pop((event.request_id, event.connection_id), None)
+        if command_span is not None:
+            command_span.end()
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        command_span = self._spans.pop((event.request_id, event.connection_id), None)
+        if command_span is not None:
+            command_span.set_status(Status(StatusCode.ERROR, str(event.failure)))
+            command_span.end()
+
+
+def mongo_event_listeners() -> list[monitoring.CommandListener]:
+    return [MongoTracingListener()] if _tracer is not None else []
+
+
+def setup_celery_tracing() -> None:
+    """Propagate trace context from publishers into Celery task spans."""
+    if not setup_tracing():
+        return
+    from celery import signals
+
+    active: dict[str, tuple[Any, Any]] = {}
+
+    @signals.before_task_publish.connect(weak=False)
+    def inject_context(headers: Optional[dict] = None, **kwargs):
+        if headers is not None:
+            propagate.inject(headers)
+
+    @signals.task_prerun.connect(weak=False)
+    def start_task_span(task_id: str = None, task: Any = None, **kwargs):
+        parent = propagate.extract(getattr(task.request, "__dict__", {}) or {})
+        task_span = _tracer.start_span(
+            f"celery {task.name}", context=parent, kind=SpanKind.CONSUMER
+        )
+        token = otel_context.attach(trace.set_span_in_context(task_span))
+        active[task_id] = (task_span, token)
+
+    @signals.task_postrun.connect(weak=False)
+    def end_task_span(task_id: str = None, state: Optional[str] = None, **kwargs):
+        task_span, token = active.pop(task_id, (None, None))
+        if task_span is None:
+            return
+        if state and state != "SUCCESS":
+            task_span.set_status(Status(StatusCode.ERROR, state))
+        task_span.end()
+        otel_context.detach(token)
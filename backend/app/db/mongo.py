@@ -2,6 +2,8 @@ from motor.motor_asyncio import AsyncIOMotorClient
 
 from app.core.config import env
 from app.core.logging import get_logger
+from app.core.tracing import mongo_event_listeners
+from app.db.monitoring import slow_query_listeners
 
 logger = get_logger("app.db.mongo")
 
@@ -15,7 +17,12 @@ mongo = MongoDB()
 
 
 async def connect_to_mongo():
-    mongo.client = AsyncIOMotorClient(env.mongo_uri)
+    slow_query = slow_query_listeners()
+    mongo.client = AsyncIOMotorClient(
+        env.mongo_uri, event_listeners=mongo_event_listeners() + slow_query
+    )
+    for listener in slow_query:
+        listener.client = mongo.client
     mongo.db = mongo.client["universal_downloader"]
     logger.info("MongoDB Connected Successfully.")
 
@@ -0,0 +1,188 @@
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+from pymongo import monitoring
+
+from app.core.config import env
+from app.core.logging import get_logger
+
+logger = get_logger("app.db.monitoring")
+
+# Driver bookkeeping fields that say nothing about the query shape.
+IGNORED_FIELDS = {
+    "lsid",
+    "txnNumber",
+    "autocommit",
+    "startTransaction",
+    "$db",
+    "$clusterTime",
+    "$readPreference",
+    "signature",
+}
+# Upper bound on remembered query shapes, should many distinct shapes turn
+# slow within one log interval.
+MAX_THROTTLED_SHAPES = 1024
+EXPLAINABLE_COMMANDS = {
+    "find",
+    "aggregate",
+    "count",
+    "distinct",
+    "update",
+    "delete",
+    "findAndModify",
+}
+
+
+def redact(value: Any) -> Any:
+    """Replace literals with '?' while keeping field names and operators."""
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # Sub-documents ($or/$and branches, pipeline stages) are part of the shape;
+        # scalar lists ($in) collapse so their length doesn't split shapes.
+        if any(isinstance(item, dict) for item in value):
+            return [redact(item) for item in value]
+        return ["?"] if value else []
+    return "?"
+
+
+def command_shape(command_name: str, command: dict[str, Any]) -> dict[str, Any]:
+    shape: dict[str, Any] = {command_name: command.get(command_name)}
+    for key, value in command.items():
+        if key == command_name or key in IGNORED_FIELDS:
+            continue
+        # Projections and sort specs are shape, not data.
+        shape[key] = value if key in ("projection", "sort") else redact(value)
+    return shape
+
+
+def _plan_stages(plan: dict[str, Any]) -> list[str]:
+    stages = []
+    while isinstance(plan, dict):
+        stage = plan.get("stage")
+        if stage:
+            index = plan.get("indexName")
+            stages.append(f"{stage}({index})" if index else stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return stages
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """
+    Logs Mongo commands slower than MONGO_SLOW_QUERY_MS with literals redacted,
+    at most once per query shape per MONGO_SLOW_QUERY_LOG_INTERVAL_SECONDS, and
+    captures the query plan with an asynchronous `explain`.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, client: Any = None):
+        self.loop = loop
+        self.client = client
+        self.threshold_micros = env.mongo_slow_query_ms * 1000
+        self.interval = env.mongo_slow_query_log_interval_seconds
+        self._commands: dict[tuple[int, Any], tuple[str, str, dict]] = {}
+        # Shape -> last log time, oldest first.
+        self._last_logged: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name not in EXPLAINABLE_COMMANDS:
+            return
+        self._commands[(event.request_id, event.connection_id)] = (
+            event.command_name,
+            event.database_name,
+            event.command,
+        )
+
+    def _prune(self, now: float) -> None:
+        """Forget shapes whose throttle window has passed. Caller holds the lock."""
+        while self._last_logged:
+            oldest = next(iter(self._last_logged.values()))
+            if (
+                now - oldest < self.interval
+                and len(self._last_logged) <= MAX_THROTTLED_SHAPES
+            ):
+                break
+            self._last_logged.popitem(last=False)
+
+    def _finish(self, event, failed: bool = False) -> None:
+        started = self._commands.pop((event.request_id, event.connection_id), None)
+        if started is None or event.duration_micros < self.threshold_micros:
+            return
+        command_name, database, command = started
+        shape = command_shape(command_name, command)
+        shape_key = f"{database}:{json.dumps(shape, sort_keys=True, default=str)}"
+
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_logged.get(shape_key)
+            if last is not None and now - last < self.interval:
+                return
+            self._last_logged[shape_key] = now
+            self._last_logged.move_to_end(shape_key)
+            self._prune(now)
+
+        logger.warning(
+            "Slow Mongo command",
+            extra={
+                "extra": {
+                    "database": database,
+                    "command": command_name,
+                    "shape": shape,
+                    "duration_ms": round(event.duration_micros / 1000, 2),
+                    "failed": failed,
+                }
+            },
+        )
+        if env.mongo_slow_query_explain and self.client is not None and not failed:
+            self.loop.call_soon_threadsafe(
+                lambda: asyncio.ensure_future(
+                    self._explain(database, command_name, command, shape)
+                )
+            )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, failed=True)
+
+    async def _explain(
+        self, database: str, command_name: str, command: dict, shape: dict
+    ) -> Optional[dict]:
+        explainable = {
+            key: value for key, value in command.items() if key not in IGNORED_FIELDS
+        }
+        try:
+            result = await self.client[database].command(
+                {"explain": explainable, "verbosity": "queryPlanner"}
+            )
+        except Exception as e:
+            logger.debug(f"Explain failed for slow {command_name}: {e}")
+            return None
+
+        planner = result.get("queryPlanner") or (
+            (result.get("stages") or [{}])[0].get("$cursor", {}).get("queryPlanner", {})
+        )
+        stages = _plan_stages(planner.get("winningPlan", {}))
+        logger.warning(
+            "Slow Mongo command plan",
+            extra={
+                "extra": {
+                    "database": database,
+                    "command": command_name,
+                    "shape": shape,
+                    "winning_plan": stages,
+                    "collection_scan": "COLLSCAN" in stages,
+                }
+            },
+        )
+        return planner
+
+
+def slow_query_listeners() -> list[monitoring.CommandListener]:
+    if not env.mongo_slow_query_enabled:
+        return []
+    return [SlowQueryListener(loop=asyncio.get_running_loop())]
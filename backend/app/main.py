@@ -1,9 +1,9 @@
 import os
 from fastapi import FastAPI, Request
 from contextlib import asynccontextmanager
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import HTMLResponse
+from starlette.middleware.gzip import GZipMiddleware
 from fastapi.exceptions import HTTPException, RequestValidationError
 
 
@@ -24,22 +24,67 @@ from app.db.mongo import connect_to_mongo, close_mongo_connection
 
 from app.common.api import common_api_router
 from app.api.main import api_main_router
+from app.api.room.services import presence_tracker
+from app.api.room.affinity import room_affinity
+from app.api.room.realtime import room_manager, playback_coalescer
+from app.api.auth.services import principal_cache
+from app.api.auth.events import auth_event_consumer
+from app.common.static import static_assets
+from app.core.task_queue import task_queue
+from app.core.admission import AdmissionControlMiddleware
+from app.core.redis import redis_client, redis_read_client, redis_pubsub_client
+from app.core.tracing import (
+    TracingMiddleware,
+    setup_tracing,
+    shutdown_tracing,
+    instrument_redis,
+)
 
 
 # =====================================APPLICATION_LOGIC_STARTS=====================================
 
 logger = get_logger("app.main")
 
+if setup_tracing():
+    instrument_redis(redis_client, redis_read_client, redis_pubsub_client)
+
+templates = Jinja2Templates(
+    directory=os.path.join(globalSettings.STATIC_DIR, "templates")
+)
+INDEX_PAGE_KEY = "__index__"
+
+
+def load_static_assets():
+    """Precompress static files and pre-render the (request-independent) index page."""
+    static_assets.load_directory(globalSettings.STATIC_DIR)
+    index_page = templates.get_template("index.html").render()
+    static_assets.add(INDEX_PAGE_KEY, index_page.encode(), "text/html; charset=utf-8")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    load_static_assets()
     await connect_to_mongo()
     await initialize_beanie()
     await connect_to_redis()
+    task_queue.start()
+    presence_tracker.start()
+    room_affinity.start()
+    room_manager.start()
+    principal_cache.start()
+    auth_event_consumer.start()
     yield
 
+    await auth_event_consumer.stop()
+    await principal_cache.stop()
+    await playback_coalescer.stop()
+    await room_manager.stop()
+    await room_affinity.stop()
+    await presence_tracker.stop()
+    await task_queue.stop()
     await close_mongo_connection()
     await close_redis_connection()
+    shutdown_tracing()
 
 
 if env.app_env not in ["developement", "production"]:
@@ -68,8 +113,12 @@ else:
         swagger_ui_parameters={"defaultModelsExpandDepth": -1},
     )
 
-app.mount("/static", StaticFiles(directory=globalSettings.STATIC_DIR), name="static")
-templates = Jinja2Templates(directory="app/static/templates")
+if env.gzip_enabled:
+    app.add_middleware(GZipMiddleware, minimum_size=env.gzip_minimum_size)
+if env.admission_enabled:
+    app.add_middleware(AdmissionControlMiddleware)
+if env.tracing_enabled:
+    app.add_middleware(TracingMiddleware)
 
 app.add_exception_handler(BaseException, app_exception_handler)
 app.add_exception_handler(HTTPException, http_exception_handler)
@@ -80,11 +129,16 @@ app.include_router(router=common_api_router, prefix=Constants.API_V1_URL)
 app.include_router(router=api_main_router, prefix=Constants.API_V1_URL)
 
 
+@app.get("/static/{path:path}", include_in_schema=False, name="static")
+async def static(path: str, request: Request):
+    return static_assets.response(path, request)
+
+
 @app.get("/favicon.ico", include_in_schema=False)
-async def favicon():
-    return FileResponse(os.path.join(globalSettings.STATIC_DIR, "favicon/favicon.ico"))
+async def favicon(request: Request):
+    return static_assets.response("favicon/favicon.ico", request)
 
 
 @app.get("/", response_class=HTMLResponse, include_in_schema=False)
 async def root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return static_assets.response(INDEX_PAGE_KEY, request, cache_control="no-cache")
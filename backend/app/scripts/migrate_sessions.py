@@ -0,0 +1,133 @@
+"""
+Convert legacy JSON-blob sessions into the compact hash format.
+
+Usage:
+    python -m app.scripts.migrate_sessions [--dry-run] [--batch-size 500]
+"""
+
+import asyncio
+import argparse
+
+from app.core.redis import redis_client, connect_to_redis, close_redis_connection
+from app.core.logging import get_logger
+from app.api.auth.services import (
+    SESSION_PREFIX,
+    decode_legacy_session,
+    compact_session_fields,
+)
+
+logger = get_logger("app.scripts.migrate_sessions")
+
+# Convert one key only if it still holds the JSON we decoded and still has an
+# expiry, so a concurrent logout/revoke is never undone and no session hash is
+# ever written without a TTL.
+# KEYS: session key. ARGV: expected JSON, field/value pairs...
+_CONVERT_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+  return 0
+end
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl <= 0 then
+  return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('PEXPIRE', KEYS[1], ttl)
+return 1
+"""
+
+
+async def _memory_usage(keys: list[str]) -> list[int]:
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.memory_usage(key, samples=0)
+        return [usage or 0 for usage in await pipe.execute()]
+
+
+async def migrate(dry_run: bool = False, batch_size: int = 500) -> dict[str, int]:
+    report = {
+        "scanned": 0,
+        "legacy": 0,
+        "migrated": 0,
+        "skipped": 0,
+        "bytes_before": 0,
+        "bytes_after": 0,
+    }
+    batch: list[str] = []
+    convert = redis_client.register_script(_CONVERT_SCRIPT)
+
+    async def _flush(keys: list[str]) -> None:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.type(key)
+            types = await pipe.execute()
+        keys = [key for key, kind in zip(keys, types) if kind == "string"]
+        report["legacy"] += len(keys)
+        if not keys:
+            return
+
+        report["bytes_before"] += sum(await _memory_usage(keys))
+        if dry_run:
+            return
+
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.get(key)
+            values = await pipe.execute()
+
+        candidates = [(key, data) for key, data in zip(keys, values) if data]
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key, data in candidates:
+                args: list = [data]
+                for field, value in compact_session_fields(
+                    **decode_legacy_session(data)
+                ).items():
+                    args.extend((field, value))
+                await convert(keys=[key], args=args, client=pipe)
+            converted = await pipe.execute() if candidates else []
+
+        migrated = [key for (key, _), done in zip(candidates, converted) if done]
+        # Changed, revoked or expiry-less keys are left alone.
+        report["skipped"] += len(keys) - len(migrated)
+        report["migrated"] += len(migrated)
+        report["bytes_after"] += sum(await _memory_usage(migrated))
+
+    async for key in redis_client.scan_iter(match=f"{SESSION_PREFIX}:*", count=1000):
+        report["scanned"] += 1
+        batch.append(key)
+        if len(batch) >= batch_size:
+            await _flush(batch)
+            batch = []
+    if batch:
+        await _flush(batch)
+
+    return report
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only measure legacy keys"
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    await connect_to_redis()
+    try:
+        report = await migrate(dry_run=args.dry_run, batch_size=args.batch_size)
+    finally:
+        await close_redis_connection()
+
+    print(f"Session keys scanned : {report['scanned']}")
+    print(f"Legacy JSON sessions : {report['legacy']}")
+    print(f"Migrated             : {report['migrated']}")
+    print(f"Skipped              : {report['skipped']}")
+    print(f"Memory before (bytes): {report['bytes_before']}")
+    if not args.dry_run:
+        print(f"Memory after  (bytes): {report['bytes_after']}")
+        saved = report["bytes_before"] - report["bytes_after"]
+        print(f"Saved         (bytes): {saved}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,356 @@
+"""
+Simulate room participants against a locally running app and report fan-out latency.
+
+Scenarios:
+    join  - every participant connects at once; measures connect-to-snapshot time
+    seek  - participants scrub the seek bar at --rate events/s each
+    chat  - participants send chat messages at --rate messages/s each
+
+Reported: fan-out latency percentiles (server receipt to client receipt for
+playback, client send to client receipt for chat), dropped events (gaps in
+the room version sequence), and per-worker memory per connection from
+/stats/process (admin-only, so pass --admin-token).
+
+Rooms are named load-room-<n>. The tool connects to the app's Redis and
+Mongo (same settings as the app) and, when the run ends, deletes those
+rooms' state, presence and persisted chat history.
+
+Usage:
+    python -m app.scripts.room_load [--scenario seek] [--clients 1000] [--rooms 50]
+        [--duration 30] [--rate 2] [--binary] [--url ws://localhost:8000]
+        [--admin-token <token>]
+"""
+
+import json
+import time
+import random
+import asyncio
+import argparse
+import resource
+import urllib.request
+from typing import Any, Optional
+from dataclasses import dataclass, field
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+
+from app.core.jwt import create_access_token
+from app.core.redis import redis_client, connect_to_redis, close_redis_connection
+from app.db.mongo import mongo, connect_to_mongo, close_mongo_connection
+from app.common.constants import Constants
+from app.api.room.codec import BINARY_SUBPROTOCOL, binary_codec, json_codec
+from app.api.room.models import ChatBucket
+from app.api.room.state import room_keys
+from app.api.room.services import presence_keys
+
+SCENARIOS = ("join", "seek", "chat")
+# Ramp-up limit for the seek and chat scenarios; join opens every socket at once.
+DEFAULT_CONNECT_CONCURRENCY = 200
+PLAYBACK_TYPES = {"play", "pause", "seek"}
+CHAT_PREFIX = "load:"
+# Only rooms with this prefix are created, and removed again afterwards.
+LOAD_ROOM_PREFIX = "load-room-"
+
+
+def now_ms() -> float:
+    return time.time_ns() / 1_000_000
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+@dataclass
+class LoadReport:
+    connect_ms: list[float] = field(default_factory=list)
+    fanout_ms: list[float] = field(default_factory=list)
+    sent: int = 0
+    received: int = 0
+    dropped: int = 0
+    redirects: int = 0
+    failed_connects: int = 0
+
+
+class Participant:
+    """One simulated room member: a socket, a reader and an optional sender."""
+
+    def __init__(
+        self, index: int, room_id: str, args: argparse.Namespace, report: LoadReport
+    ):
+        self.user_id = f"load-{index}"
+        self.room_id = room_id
+        self.args = args
+        self.report = report
+        self.codec = binary_codec if args.binary else json_codec
+        self.token = create_access_token(
+            subject=self.user_id, token_version=1, role="user"
+        )
+        self.ws = None
+        self.last_v: Optional[int] = None
+
+    def _url(self) -> str:
+        return (
+            f"{self.args.url.rstrip('/')}{Constants.API_V1_URL}/room/"
+            f"{self.room_id}/ws?token={self.token}"
+        )
+
+    async def connect(self) -> bool:
+        url = self._url()
+        subprotocols = [BINARY_SUBPROTOCOL] if self.args.binary else None
+        started = now_ms()
+        for _ in range(2):
+            try:
+                self.ws = await connect(url, subprotocols=subprotocols, max_queue=None)
+                initial = self.codec.decode(await self.ws.recv())
+            except (OSError, ConnectionClosed, asyncio.TimeoutError):
+                self.report.failed_connects += 1
+                return False
+            if initial.get("type") == "redirect":
+                # Room affinity: follow the hint to the owning node once.
+                self.report.redirects += 1
+                url = initial["url"]
+                continue
+            self._track_initial(initial)
+            self.report.connect_ms.append(now_ms() - started)
+            return True
+        self.report.failed_connects += 1
+        return False
+
+    def _track_initial(self, message: dict[str, Any]) -> None:
+        if message.get("type") == "snapshot":
+            self.last_v = message["v"]
+        elif message.get("type") == "deltas" and message["events"]:
+            self.last_v = message["events"][-1]["v"]
+
+    def _track(self, message: dict[str, Any], received_at: float) -> None:
+        v = message.get("v")
+        if v is not None:
+            if self.last_v is not None and v > self.last_v + 1:
+                self.report.dropped += v - self.last_v - 1
+            if self.last_v is None or v > self.last_v:
+                self.last_v = v
+
+        message_type = message.get("type")
+        if message_type in PLAYBACK_TYPES and "server_ts" in message:
+            self.report.fanout_ms.append(received_at - message["server_ts"])
+        elif message_type == "chat" and message.get("text", "").startswith(CHAT_PREFIX):
+            sent_at = float(message["text"][len(CHAT_PREFIX) :])
+            self.report.fanout_ms.append(received_at - sent_at)
+
+    async def read(self) -> None:
+        try:
+            async for frame in self.ws:
+                received_at = now_ms()
+                self.report.received += 1
+                self._track(self.codec.decode(frame), received_at)
+        except ConnectionClosed:
+            pass
+
+    async def send_loop(self, scenario: str, until: float) -> None:
+        interval = 1 / self.args.rate
+        # Spread senders over the first interval instead of firing in lockstep.
+        await asyncio.sleep(random.uniform(0, interval))
+        position = random.uniform(0, 600)
+        while time.monotonic() < until:
+            if scenario == "seek":
+                position = max(0.0, position + random.uniform(-5, 5))
+                message = {"type": "seek", "position": position}
+            else:
+                message = {"type": "chat", "text": f"{CHAT_PREFIX}{now_ms()}"}
+            try:
+                await self.ws.send(self.codec.encode(message))
+            except ConnectionClosed:
+                return
+            self.report.sent += 1
+            await asyncio.sleep(interval)
+
+    async def close(self) -> None:
+        if self.ws is not None:
+            await self.ws.close()
+
+
+def _fetch_process_stats(base_url: str, token: str) -> dict[str, Any]:
+    url = base_url.replace("ws://", "http://").replace("wss://", "https://")
+    request = urllib.request.Request(
+        f"{url.rstrip('/')}{Constants.API_V1_URL}/stats/process",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+
+async def sample_workers(
+    base_url: str, token: Optional[str], samples: int
+) -> dict[int, dict[str, Any]]:
+    """
+    Hit /stats/process repeatedly; the OS spreads requests over the workers.
+    The route is admin-only, so without a token nothing is sampled.
+    """
+    workers: dict[int, dict[str, Any]] = {}
+    if not token:
+        return workers
+    for _ in range(samples):
+        try:
+            stats = await asyncio.to_thread(_fetch_process_stats, base_url, token)
+        except OSError:
+            continue
+        workers[stats["pid"]] = stats
+    return workers
+
+
+def _raise_fd_limit() -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def run(args: argparse.Namespace) -> LoadReport:
+    _raise_fd_limit()
+    report = LoadReport()
+    participants = [
+        Participant(i, f"{LOAD_ROOM_PREFIX}{i % args.rooms}", args, report)
+        for i in range(args.clients)
+    ]
+
+    baseline = await sample_workers(args.url, args.admin_token, args.stats_samples)
+    concurrency = args.connect_concurrency or (
+        args.clients if args.scenario == "join" else DEFAULT_CONNECT_CONCURRENCY
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def join(participant: Participant) -> bool:
+        async with semaphore:
+            return await participant.connect()
+
+    started = time.monotonic()
+    joined = await asyncio.gather(*(join(p) for p in participants))
+    connected = [p for p, ok in zip(participants, joined) if ok]
+    join_seconds = time.monotonic() - started
+    readers = [asyncio.create_task(p.read()) for p in connected]
+
+    loaded = await sample_workers(args.url, args.admin_token, args.stats_samples)
+
+    if args.scenario in ("seek", "chat"):
+        until = time.monotonic() + args.duration
+        await asyncio.gather(*(p.send_loop(args.scenario, until) for p in connected))
+        # Let in-flight fan-out land before closing.
+        await asyncio.sleep(1)
+    else:
+        await asyncio.sleep(args.duration)
+
+    await asyncio.gather(*(p.close() for p in connected), return_exceptions=True)
+    await asyncio.gather(*readers, return_exceptions=True)
+
+    print(
+        f"Scenario            : {args.scenario} ({'binary' if args.binary else 'json'})"
+    )
+    print(
+        f"Connected           : {len(connected)}/{args.clients} in {join_seconds:.2f}s"
+    )
+    print(
+        f"Failed connects     : {report.failed_connects} (redirects {report.redirects})"
+    )
+    print(
+        "Connect ms          : "
+        + " ".join(f"p{p}={percentile(report.connect_ms, p):.1f}" for p in (50, 95, 99))
+    )
+    if args.scenario != "join":
+        rate = report.received / max(args.duration, 1)
+        print(
+            f"Sent / received     : {report.sent} / {report.received} ({rate:.0f} msg/s)"
+        )
+        print(
+            "Fan-out latency ms  : "
+            + " ".join(
+                f"p{p}={percentile(report.fanout_ms, p):.1f}"
+                for p in (50, 90, 99, 99.9)
+            )
+        )
+        print(f"Dropped (v gaps)    : {report.dropped}")
+    if not args.admin_token:
+        print("Memory per worker   : skipped (pass --admin-token)")
+    for pid, stats in sorted(loaded.items()):
+        before = baseline.get(pid)
+        sockets = stats["room_sockets"] - (before["room_sockets"] if before else 0)
+        if stats["rss_bytes"] is None:
+            print(
+                f"Worker {pid:<8}     : {sockets} sockets (RSS not reported on this platform)"
+            )
+        elif before and sockets > 0:
+            per_connection = (stats["rss_bytes"] - before["rss_bytes"]) / sockets
+            print(
+                f"Worker {pid:<8}     : {sockets} sockets, "
+                f"{per_connection / 1024:.1f} KiB/connection"
+            )
+        else:
+            print(
+                f"Worker {pid:<8}     : {stats['room_sockets']} sockets (no baseline)"
+            )
+    return report
+
+
+async def cleanup(rooms: int) -> tuple[int, int]:
+    """Delete the load rooms' Redis keys and chat buckets; returns both counts."""
+    room_ids = [f"{LOAD_ROOM_PREFIX}{i}" for i in range(rooms)]
+    keys = [
+        key
+        for room_id in room_ids
+        for key in (*room_keys(room_id), *presence_keys(room_id))
+    ]
+    deleted_keys = 0
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.delete(key)
+        deleted_keys = sum(await pipe.execute())
+    # An anchored prefix regex uses the room_id index and also catches rooms
+    # left by an earlier run with a larger --rooms.
+    result = await mongo.db[ChatBucket.Settings.name].delete_many(
+        {"room_id": {"$regex": f"^{LOAD_ROOM_PREFIX}"}}
+    )
+    return deleted_keys, result.deleted_count
+
+
+async def run_and_clean_up(args: argparse.Namespace) -> LoadReport:
+    await connect_to_redis()
+    await connect_to_mongo()
+    try:
+        return await run(args)
+    finally:
+        deleted_keys, deleted_buckets = await cleanup(args.rooms)
+        print(
+            f"Cleaned up          : {deleted_keys} Redis keys, {deleted_buckets} chat buckets"
+        )
+        await close_mongo_connection()
+        await close_redis_connection()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="ws://localhost:8000")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="seek")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load")
+    parser.add_argument(
+        "--rate", type=float, default=2, help="Events/s per participant"
+    )
+    parser.add_argument("--binary", action="store_true", help="Use the binary codec")
+    parser.add_argument(
+        "--connect-concurrency",
+        type=int,
+        default=None,
+        help=f"Sockets opened at once (default: all for join, {DEFAULT_CONNECT_CONCURRENCY} otherwise)",
+    )
+    parser.add_argument("--stats-samples", type=int, default=20)
+    parser.add_argument(
+        "--admin-token",
+        help="Access token of an admin user; enables the per-worker memory report",
+    )
+    asyncio.run(run_and_clean_up(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Production entry point.
+
+Usage:
+    python -m app.server
+"""
+
+import os
+import inspect
+import importlib.util
+from pathlib import Path
+
+import uvicorn
+
+from app.core.config import env
+from app.core.logging import get_logger
+from app.common.constants import Constants
+
+logger = get_logger("app.server")
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects affinity / cgroup cpusets)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count() -> int:
+    return env.web_concurrency or available_cpus()
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def event_loop() -> str:
+    return "uvloop" if _installed("uvloop") else "asyncio"
+
+
+def http_parser() -> str:
+    return "httptools" if _installed("httptools") else "h11"
+
+
+def recycle_options() -> dict[str, int]:
+    """
+    Worker recycling settings. Each worker adds its own random 0..jitter
+    requests to SERVER_MAX_REQUESTS (default jitter: 10% of it), so workers
+    started together do not all restart at the same moment.
+    """
+    if not env.server_max_requests:
+        return {}
+    options = {"limit_max_requests": env.server_max_requests}
+    jitter = env.server_max_requests_jitter
+    if jitter is None:
+        jitter = env.server_max_requests // 10
+    if "limit_max_requests_jitter" in inspect.signature(uvicorn.Config).parameters:
+        options["limit_max_requests_jitter"] = jitter
+    elif jitter:
+        logger.warning(
+            "This uvicorn has no limit_max_requests_jitter; workers will recycle together."
+        )
+    return options
+
+
+def check_jwt_keys() -> None:
+    """
+    Load the JWT key pair once in the supervisor, so a missing key fails the
+    launch instead of the first login. Workers read the key files themselves:
+    only the resolved paths are exported to them, never the key material,
+    which would otherwise be inherited by every child process.
+    """
+    from app.core import jwt
+
+    if not jwt._PRIVATE_KEY or not jwt._PUBLIC_KEY:
+        raise SystemExit("JWT key pair could not be loaded; refusing to start.")
+    os.environ["JWT_PRIVATE_KEY_PATH"] = str(Path(env.jwt_private_key_path).resolve())
+    os.environ["JWT_PUBLIC_KEY_PATH"] = str(Path(env.jwt_public_key_path).resolve())
+
+
+def main() -> None:
+    check_jwt_keys()
+    workers = worker_count()
+    loop, http = event_loop(), http_parser()
+    logger.info(
+        f"Starting {Constants.APP_NAME} with {workers} workers (loop={loop}, http={http})"
+    )
+    uvicorn.run(
+        "app.main:app",
+        host=Constants.APP_HOST,
+        port=Constants.APP_PORT,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=env.server_backlog,
+        timeout_keep_alive=env.server_keep_alive_seconds,
+        **recycle_options(),
+        timeout_graceful_shutdown=env.server_graceful_timeout_seconds,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+
+# Settings are read at import time; give the required ones harmless defaults
+# so the app modules can be imported without a .env file.
+os.environ.setdefault("APP_ENV", "developement")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017/streamdock_test")
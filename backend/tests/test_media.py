@@ -0,0 +1,128 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import fakeredis
+from fastapi import HTTPException
+
+from app.api.media import services
+from app.api.media.services import (
+    NEGATIVE_CACHE_MARKER,
+    LocalStubResolver,
+    MediaMetadataService,
+)
+
+VIDEO = {"title": "Stub video", "duration": 42.0, "thumbnail_url": None}
+
+
+class StubProvider(BaseHTTPRequestHandler):
+    """Local provider for LocalStubResolver; counts the requests it serves."""
+
+    hits: dict[str, int] = {}
+
+    def do_GET(self):
+        StubProvider.hits[self.path] = StubProvider.hits.get(self.path, 0) + 1
+        if self.path == "/video.json":
+            # Slow enough for concurrent resolves to overlap.
+            time.sleep(0.1)
+            body = json.dumps(VIDEO).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == "/elsewhere":
+            self.send_response(302)
+            self.send_header("Location", "http://metadata.internal/latest")
+            self.end_headers()
+        else:
+            self.send_error(404)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def provider_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubProvider)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(services, "redis_client", client)
+    StubProvider.hits.clear()
+    return client
+
+
+@pytest.fixture
+def service():
+    return MediaMetadataService(resolvers=[LocalStubResolver()])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_resolves_share_one_fetch(redis, service, provider_url):
+    url = f"{provider_url}/video.json"
+    results = await asyncio.gather(*(service.resolve(url) for _ in range(10)))
+
+    assert StubProvider.hits == {"/video.json": 1}
+    assert {r.title for r in results} == {"Stub video"}
+    assert results[0].provider == "stub" and results[0].duration == 42.0
+
+
+@pytest.mark.asyncio
+async def test_cached_metadata_skips_the_provider(redis, service, provider_url):
+    url = f"{provider_url}/video.json"
+    first = await service.resolve(url)
+    second = await service.resolve(url)
+
+    assert first == second
+    assert StubProvider.hits == {"/video.json": 1}
+    assert await redis.ttl(service._cache_key(url)) > 0
+
+
+@pytest.mark.asyncio
+async def test_negative_cache_marker_is_a_404(redis, service, provider_url):
+    url = f"{provider_url}/video.json"
+    await redis.set(service._cache_key(url), NEGATIVE_CACHE_MARKER)
+
+    with pytest.raises(HTTPException) as exc:
+        await service.resolve(url)
+    assert exc.value.status_code == 404
+    assert StubProvider.hits == {}
+
+
+@pytest.mark.asyncio
+async def test_provider_miss_is_cached_negatively(redis, service, provider_url):
+    url = f"{provider_url}/missing"
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            await service.resolve(url)
+        assert exc.value.status_code == 404
+
+    assert StubProvider.hits == {"/missing": 1}
+    assert await redis.get(service._cache_key(url)) == NEGATIVE_CACHE_MARKER
+
+
+@pytest.mark.asyncio
+async def test_redirect_off_the_host_list_is_refused(redis, service, provider_url):
+    with pytest.raises(HTTPException) as exc:
+        await service.resolve(f"{provider_url}/elsewhere")
+    assert exc.value.status_code == 404
+    assert StubProvider.hits == {"/elsewhere": 1}
+
+
+@pytest.mark.asyncio
+async def test_unsupported_host_is_a_400(redis, service):
+    with pytest.raises(HTTPException) as exc:
+        await service.resolve("https://videos.example.com/watch?v=1")
+    assert exc.value.status_code == 400
+    assert await redis.keys("*") == []
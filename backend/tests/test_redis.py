@@ -0,0 +1,156 @@
+import os
+
+import pytest
+import redis.asyncio as aioredis
+from redis.asyncio.cluster import RedisCluster
+from redis.asyncio.connection import Connection
+
+from app.core import redis as redis_module
+from app.core.config import env
+from app.core.redis import (
+    InstrumentedBlockingConnectionPool,
+    InstrumentedSentinelConnectionPool,
+    _build_clients,
+    _sentinel_hosts,
+)
+
+REDIS_TEST_URL = os.environ.get("REDIS_TEST_URL", "redis://localhost:6379/15")
+
+
+class IdleConnection(Connection):
+    """Connection that never touches the network, for pool accounting tests."""
+
+    async def connect(self):
+        pass
+
+    async def can_read_destructive(self):
+        return False
+
+    async def disconnect(self, nowait: bool = False):
+        pass
+
+
+async def _local_redis() -> aioredis.Redis:
+    client = aioredis.Redis.from_url(REDIS_TEST_URL, decode_responses=True)
+    try:
+        await client.ping()
+    except (aioredis.ConnectionError, OSError):
+        await client.aclose()
+        pytest.skip(f"No Redis server at {REDIS_TEST_URL}")
+    return client
+
+
+def test_sentinel_hosts_default_port(monkeypatch):
+    monkeypatch.setattr(env, "redis_sentinel_hosts", "s1:26380, s2 ,")
+    assert _sentinel_hosts() == [("s1", 26380), ("s2", 26379)]
+
+
+def test_unknown_mode_is_rejected(monkeypatch):
+    monkeypatch.setattr(env, "redis_mode", "replicated")
+    with pytest.raises(ValueError):
+        _build_clients()
+
+
+def test_standalone_shares_one_client_by_default(monkeypatch):
+    monkeypatch.setattr(env, "redis_mode", "standalone")
+    monkeypatch.setattr(env, "redis_replica_reads", False)
+    primary, read, pubsub = _build_clients()
+    assert read is primary and pubsub is primary
+    assert isinstance(primary.connection_pool, InstrumentedBlockingConnectionPool)
+    assert primary.connection_pool.max_connections == env.redis_max_connections
+
+
+def test_standalone_replica_reads(monkeypatch):
+    monkeypatch.setattr(env, "redis_mode", "standalone")
+    monkeypatch.setattr(env, "redis_replica_reads", True)
+    monkeypatch.setattr(env, "redis_replica_url", "redis://replica.local:6380/0")
+    primary, read, pubsub = _build_clients()
+    assert read is not primary and pubsub is primary
+    assert read.connection_pool.connection_kwargs["host"] == "replica.local"
+
+
+def test_sentinel_uses_blocking_instrumented_pools(monkeypatch):
+    monkeypatch.setattr(env, "redis_mode", "sentinel")
+    monkeypatch.setattr(env, "redis_sentinel_hosts", "localhost:26379")
+    monkeypatch.setattr(env, "redis_replica_reads", True)
+    primary, read, pubsub = _build_clients()
+    assert pubsub is primary
+    for client in (primary, read):
+        assert isinstance(client.connection_pool, InstrumentedSentinelConnectionPool)
+    assert read.connection_pool.is_master is False
+
+
+def test_cluster_gets_a_plain_pubsub_client(monkeypatch):
+    monkeypatch.setattr(env, "redis_mode", "cluster")
+    monkeypatch.setattr(env, "redis_replica_reads", False)
+    primary, read, pubsub = _build_clients()
+    assert isinstance(primary, RedisCluster) and read is primary
+    assert not hasattr(primary, "pubsub")
+    assert isinstance(pubsub, aioredis.Redis)
+    assert pubsub.pubsub() is not None
+
+
+def test_pool_stats_report_primary_alias(monkeypatch):
+    client = aioredis.Redis.from_pool(
+        InstrumentedBlockingConnectionPool.from_url(REDIS_TEST_URL)
+    )
+    monkeypatch.setattr(redis_module, "redis_client", client)
+    monkeypatch.setattr(redis_module, "redis_read_client", client)
+    monkeypatch.setattr(redis_module, "redis_pubsub_client", client)
+    stats = redis_module.pool_stats()
+    assert stats["read"] == "primary" and stats["pubsub"] == "primary"
+    assert stats["primary"]["checkouts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_blocking_pool_times_out_and_counts_waits():
+    pool = InstrumentedBlockingConnectionPool(
+        connection_class=IdleConnection, max_connections=1, timeout=0.05
+    )
+    held = await pool.get_connection()
+    with pytest.raises(aioredis.ConnectionError):
+        await pool.get_connection()
+    await pool.release(held)
+    await pool.release(await pool.get_connection())
+
+    stats = pool.stats()
+    assert stats["checkouts"] == 3
+    assert stats["timeouts"] == 1
+    assert stats["wait_max_ms"] >= 50
+    assert stats["in_use"] == 0 and stats["idle"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_against_local_redis():
+    probe = await _local_redis()
+    await probe.aclose()
+    client = aioredis.Redis.from_pool(
+        InstrumentedBlockingConnectionPool.from_url(
+            REDIS_TEST_URL, max_connections=2, timeout=1, decode_responses=True
+        )
+    )
+    try:
+        await client.set("redis_test:key", "value", ex=10)
+        assert await client.get("redis_test:key") == "value"
+        stats = client.connection_pool.stats()
+        assert stats["checkouts"] == 2 and stats["timeouts"] == 0
+    finally:
+        await client.delete("redis_test:key")
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_session_scan_against_local_redis():
+    client = await _local_redis()
+    try:
+        keys = [f"redis_test_session:user:{i}" for i in range(25)]
+        for key in keys:
+            await client.set(key, "1", ex=10)
+        found = [
+            k
+            async for k in client.scan_iter(match="redis_test_session:user:*", count=5)
+        ]
+        assert sorted(found) == sorted(keys)
+    finally:
+        await client.delete(*keys)
+        await client.aclose()